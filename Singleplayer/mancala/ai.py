@@ -1,109 +1,484 @@
-from dataclasses import dataclass
-from typing import Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 import math
-from .rules import pit_range, own_store, other
+import time
+from .rules import MAX_PITS_PER_SIDE, PLAYER_B, RULES
 from .board import Board
-from .tt import Zobrist
+from .packed import PackedBoard
+from .tt import ZOBRIST, TranspositionTable, EXACT, UPPER, LOWER
+
+@dataclass
+class SearchStats:
+    """Counters for one choose() call, collected when the AI is built with stats=True."""
+    nodes_per_depth: Dict[int, int] = field(default_factory=dict)
+    ms_per_depth: Dict[int, float] = field(default_factory=dict)
+    tt_probes: int = 0
+    tt_hits: int = 0
+    tt_cutoffs: int = 0
+    # Beta cutoffs by the index of the move that caused them; mass at 0 means good ordering.
+    cutoff_index: List[int] = field(default_factory=list)
+    evals: int = 0
+    seconds: float = 0.0
+    pv: List[int] = field(default_factory=list)
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.nodes_per_depth.values())
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def first_move_cutoffs(self) -> float:
+        """Fraction of beta cutoffs caused by the first move searched."""
+        total = sum(self.cutoff_index)
+        return self.cutoff_index[0] / total if total else 0.0
 
 @dataclass
 class SearchResult:
     value: float
     move: Optional[int]
     nodes: int
+    depth: int = 0
+    stats: Optional[SearchStats] = None
+
+class SearchTimeout(Exception):
+    """Raised inside minimax when the deadline passes; carries the nodes searched so far."""
+    def __init__(self, nodes: int):
+        super().__init__(nodes)
+        self.nodes = nodes
+
+# Upper bound on iterative deepening in time-budgeted mode.
+MAX_DEPTH = 64
+
+# Evaluation weight of the store difference; exact endgame results use it alone.
+STORE_WEIGHT = 3.0
+
+# Width of the null windows used to test whether a move beats alpha. Evaluations
+# are multiples of 0.05, so nothing legitimately falls strictly inside it.
+NULL_WINDOW = 1e-6
+
+# Half-width of the first aspiration window around the previous iteration's value;
+# it grows 4x after each fail, and past MAX_ASPIRATION that side opens fully.
+ASPIRATION_WINDOW = 3 * STORE_WEIGHT
+MAX_ASPIRATION = 64 * STORE_WEIGHT
+
+# Static ordering bonus for moves whose last stone lands in the mover's store.
+EXTRA_TURN_BONUS = 1 << 30
+
+def reply_positions(b: Board) -> List[Board]:
+    """Every position where the side to move in b has finished its turn and
+    the opponent is to move, following extra-turn chains. Game-ending lines are left out."""
+    out, seen, todo = [], set(), [b]
+    while todo:
+        s = todo.pop()
+        for m in s.legal_moves():
+            child = s.clone()
+            extra, end = child.apply_move(m)
+            if end is not None or child.key in seen:
+                continue
+            seen.add(child.key)
+            if extra:
+                todo.append(child)
+            else:
+                out.append(child)
+    return out
 
 class AI:
-    def __init__(self, depth: int = 6, use_tt: bool = True):
+    def __init__(self, depth: int = 6, use_tt: bool = True, tt_mb: float = 16,
+                 time_ms: Optional[float] = None, workers: int = 1, smp: bool = False,
+                 endgame=None, book=None, stats: bool = False):
         self.depth = depth
+        self.time_ms = time_ms
         self.use_tt = use_tt
-        self.tt = {}  # (hash, depth) -> (flag, value)
-        self.zob = Zobrist()
+        self.tt_mb = tt_mb
+        self.tt = TranspositionTable(tt_mb)
+        self.zob = ZOBRIST
+        # Optional EndgameDB with exact values for positions with few stones in play.
+        self.endgame = endgame
+        # Optional OpeningBook; positions it covers are answered without searching.
+        self.book = book
+        # workers > 1 searches on a process pool, created on first use: root
+        # moves are split between workers, or with smp=True every worker runs
+        # the whole search and they share one transposition table (Lazy SMP).
+        self.workers = workers
+        self.smp = smp
+        self._splitter = None
+        # Shared flag (anything with .value) that aborts the search like a deadline.
+        self.stop = None
+        # Called as on_progress(depth, nodes) every 64 nodes of an iteration.
+        self.on_progress: Optional[Callable[[int, int], None]] = None
+        # stats=True attaches a SearchStats to every searched result; off, the
+        # search pays one `is None` test per counter.
+        self.collect_stats = stats
+        self._stats: Optional[SearchStats] = None
+        # Results of ponder() by position key, used by the next choose().
+        self.pondered: Dict[int, SearchResult] = {}
+        self.reset_ordering()
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self._splitter is not None:
+            self._splitter.close()
+            self._splitter = None
+
+    def new_game(self) -> None:
+        """Forget everything learned from earlier positions (TT, ordering, worker state)."""
+        self.close()
+        self.tt.clear()
+        self.pondered = {}
+        self.reset_ordering()
+
+    def reset_ordering(self) -> None:
+        # Killer moves per ply and history-heuristic scores per pit, filled by beta
+        # cutoffs; the history has room for the pits of the largest variant.
+        self.killers = []
+        self.history = [0] * (2 * MAX_PITS_PER_SIDE + 2)
+
+    def order_moves(self, state: Board, moves: list, ply: int, tt_move: Optional[int] = None) -> list:
+        """TT move first, then killers, then extra-turn moves and history scores."""
+        pits = state.pits
+        cur = state.current
+        rt = state.variant.rules
+        store = rt.stores[cur]
+        landing = rt.landing[cur]
+        n = rt.cycle_len
+        hist = self.history
+        moves.sort(key=lambda m: hist[m] + (EXTRA_TURN_BONUS if landing[m][pits[m] % n] == store else 0),
+                   reverse=True)
+        front = [tt_move]
+        if ply < len(self.killers):
+            front += self.killers[ply]
+        for m in reversed(front):
+            if m is not None and m in moves:
+                moves.remove(m)
+                moves.insert(0, m)
+        return moves
+
+    def _record_cutoff(self, m: int, ply: int, d: int) -> None:
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        k = self.killers[ply]
+        if k[0] != m:
+            k[1], k[0] = k[0], m
+        self.history[m] += d * d
 
     def evaluate(self, b: Board, player: int) -> float:
-        my_store = b.score(player)
-        opp_store_ = b.score(other(player))
-        store_diff = my_store - opp_store_
-        my_moves = len([i for i in pit_range(player) if b.pits[i] > 0])
-        opp_moves = len([i for i in pit_range(other(player)) if b.pits[i] > 0])
-        near = sum(b.pits[i] for i in pit_range(player) if (own_store(player) - i) % 14 <= 3)
-        return 3.0*store_diff + 0.3*(my_moves - opp_moves) + 0.05*near
+        pits = b.pits
+        rt = b.variant.rules
+        opp = rt.other[player]
+        store_diff = pits[rt.stores[player]] - pits[rt.stores[opp]]
+        if isinstance(b, PackedBoard):
+            occ = b.occ
+            mobility = (occ & rt.side_bits[player]).bit_count() - (occ & rt.side_bits[opp]).bit_count()
+        else:
+            # Board keeps no occupancy; count the empty pits on each side instead.
+            mobility = pits[rt.side_slices[opp]].count(0) - pits[rt.side_slices[player]].count(0)
+        near = sum(pits[i] for i in rt.near_store[player])
+        return STORE_WEIGHT*store_diff + 0.3*mobility + 0.05*near
 
     def greedy_hint(self, b: Board) -> Optional[int]:
         best, best_val = None, -math.inf
+        player = b.current
+        tmp = PackedBoard.from_board(b)
         for m in b.legal_moves():
-            tmp = b.clone()
-            tmp.apply_move(m)
-            v = self.evaluate(tmp, b.current)
+            _, _, u = tmp.apply_move(m, undo=True)
+            v = self.evaluate(tmp, player)
+            tmp.unmake(u)
             if v > best_val:
                 best_val, best = v, m
         return best
 
-    def minimax(self, b: Board, depth: int, alpha: float, beta: float, root: int) -> Tuple[float, Optional[int], int]:
+    def minimax(self, b: Board, depth: int, alpha: float, beta: float, root: int,
+                deadline: Optional[float] = None, first: Optional[int] = None,
+                moves: Optional[List[int]] = None) -> Tuple[float, Optional[int], int]:
+        """Best (value, move, nodes) for `root`, to move in b, within the window (alpha, beta).
+
+        Negamax principal-variation search: inside the tree values are for the
+        side to move (a move that earns an extra turn keeps the sign), the first
+        move gets the full window and the rest a null window, re-searched only
+        when they beat alpha. Root moves tighten alpha the same way. Values are
+        fail-soft: at or below alpha the result is an upper bound, at or above
+        beta a lower bound.
+        """
         nodes = 0
+        # Entries depend on the root side as well as the position (see Zobrist.root_key).
+        salt = self.zob.root_key if root == PLAYER_B else 0
+        on_progress = self.on_progress
+        # The endgame database holds values under the standard rules only.
+        endgame = self.endgame if b.variant.rules is RULES else None
+        st = self._stats
 
-        def _search(state: Board, d: int, a: float, bt: float) -> float:
+        def _search(state: PackedBoard, d: int, a: float, bt: float, ply: int) -> float:
             nonlocal nodes
             nodes += 1
+            if not nodes & 63:
+                if on_progress is not None:
+                    on_progress(depth, nodes)
+                if ((deadline is not None and time.perf_counter() >= deadline)
+                        or (self.stop is not None and self.stop.value)):
+                    raise SearchTimeout(nodes)
+            if endgame is not None:
+                v = endgame.probe(state)
+                if v is not None:
+                    mover = state.current
+                    # Same score evaluate() gives the final position.
+                    return STORE_WEIGHT * (state.pits[RULES.stores[mover]] - state.pits[RULES.opp_stores[mover]] + v)
             if d == 0 or state.terminal():
-                return self.evaluate(state, root)
+                if st is not None: st.evals += 1
+                v = self.evaluate(state, root)
+                return v if state.current == root else -v
 
             moves = state.legal_moves()
             if not moves:
-                return self.evaluate(state, root)
+                if st is not None: st.evals += 1
+                v = self.evaluate(state, root)
+                return v if state.current == root else -v
 
-            def score_move(m):
-                tmp = state.clone()
-                tmp.apply_move(m)
-                return self.evaluate(tmp, root)
-            moves.sort(key=score_move, reverse=True)
+            a0 = a
+            tt_move = None
+            if self.use_tt:
+                key = state.key ^ salt
+                entry = self.tt.probe(key)
+                if st is not None:
+                    st.tt_probes += 1
+                    st.tt_hits += entry is not None
+                if entry is not None:
+                    tt_move = entry[3]
+                if entry is not None and entry[0] >= d:
+                    _, flag, v, _ = entry
+                    if flag == EXACT or (flag == UPPER and v <= a) or (flag == LOWER and v >= bt):
+                        if st is not None: st.tt_cutoffs += 1
+                        return v
 
-            maximizing = (state.current == root)
-            val = -math.inf if maximizing else math.inf
+            self.order_moves(state, moves, ply, tt_move)
 
-            if self.use_tt:
-                h = self.zob.hash(state)
-                key = (h, d)
-                if key in self.tt:
-                    flag, v = self.tt[key]
-                    if flag == 0: return v
-                    if flag < 0 and v <= a: return v
-                    if flag > 0 and v >= bt: return v
-
-            for m in moves:
-                child = state.clone()
-                extra, _ = child.apply_move(m)
+            mover = state.current
+            val = -math.inf
+            best = None
+            for i, m in enumerate(moves):
+                extra, _, u = state.apply_move(m, undo=True)
                 nd = d if extra else d - 1
-                v = _search(child, nd, a, bt)
-                if maximizing:
-                    if v > val: val = v
-                    if val > a: a = val
-                    if a >= bt: break
+                # The side to move stays the same after an extra turn or a game-ending move.
+                if state.current == mover:
+                    if i == 0:
+                        v = _search(state, nd, a, bt, ply + 1)
+                    else:
+                        v = _search(state, nd, a, a + NULL_WINDOW, ply + 1)
+                        if a < v < bt:
+                            v = _search(state, nd, a, bt, ply + 1)
                 else:
-                    if v < val: val = v
-                    if val < bt: bt = val
-                    if a >= bt: break
+                    if i == 0:
+                        v = -_search(state, nd, -bt, -a, ply + 1)
+                    else:
+                        v = -_search(state, nd, -a - NULL_WINDOW, -a, ply + 1)
+                        if a < v < bt:
+                            v = -_search(state, nd, -bt, -a, ply + 1)
+                state.unmake(u)
+                if v > val:
+                    val, best = v, m
+                    if v > a: a = v
+                if a >= bt:
+                    self._record_cutoff(m, ply, d)
+                    if st is not None:
+                        ci = st.cutoff_index
+                        ci.extend([0] * (i + 1 - len(ci)))
+                        ci[i] += 1
+                    break
 
             if self.use_tt:
-                h = self.zob.hash(state)
-                key = (h, d)
-                flag = 0
-                if val <= a: flag = -1
-                elif val >= bt: flag = +1
-                self.tt[key] = (flag, val)
+                flag = EXACT
+                if val <= a0: flag = UPPER
+                elif val >= bt: flag = LOWER
+                self.tt.store(key, d, flag, val, best)
             return val
 
         best_move = None
         best_val = -math.inf
-        for m in b.legal_moves():
-            child = b.clone()
-            extra, _ = child.apply_move(m)
+        a = alpha
+        start = PackedBoard.from_board(b)
+        root_moves = start.legal_moves() if moves is None else list(moves)
+        if first in root_moves:
+            root_moves.remove(first)
+            root_moves.insert(0, first)
+        for i, m in enumerate(root_moves):
+            extra, _, u = start.apply_move(m, undo=True)
             nd = depth if extra else depth - 1
-            v = _search(child, nd, alpha, beta)
+            if start.current == root:
+                v = _search(start, nd, a, beta if i == 0 else a + NULL_WINDOW, 1)
+                if i and a < v < beta:
+                    v = _search(start, nd, a, beta, 1)
+            else:
+                v = -_search(start, nd, -beta if i == 0 else -a - NULL_WINDOW, -a, 1)
+                if i and a < v < beta:
+                    v = -_search(start, nd, -beta, -a, 1)
+            start.unmake(u)
             if v > best_val:
                 best_val, best_move = v, m
+                if v > a: a = v
+            if a >= beta:
+                break
         return best_val, best_move, nodes
 
-    def choose(self, b: Board) -> SearchResult:
+    def choose(self, b: Board, time_ms: Optional[float] = None) -> SearchResult:
+        if not self.collect_stats:
+            return self._choose(b, time_ms)
+        st = self._stats = SearchStats()
+        t0 = time.perf_counter()
+        try:
+            res = self._choose(b, time_ms)
+        finally:
+            self._stats = None
+        st.seconds = time.perf_counter() - t0
+        st.pv = self.principal_variation(b, res.move)
+        res.stats = st
+        return res
+
+    def principal_variation(self, b: Board, move: Optional[int], max_len: int = MAX_DEPTH) -> List[int]:
+        """`move` followed by the best moves the TT holds for the positions it leads to."""
+        if move is None:
+            return []
+        salt = self.zob.root_key if b.current == PLAYER_B else 0
+        s = PackedBoard.from_board(b)
+        pv, seen = [], set()
+        while move is not None and len(pv) < max_len and s.key not in seen:
+            seen.add(s.key)
+            pv.append(move)
+            s.apply_move(move)
+            entry = self.tt.probe(s.key ^ salt) if self.use_tt else None
+            move = entry[3] if entry is not None else None
+            if move is not None and (s.terminal() or move not in s.legal_moves()):
+                move = None
+        return pv
+
+    def _choose(self, b: Board, time_ms: Optional[float] = None) -> SearchResult:
         if not b.legal_moves():
             return SearchResult(self.evaluate(b, b.current), None, 0)
-        val, move, nodes = self.minimax(b, self.depth, -math.inf, math.inf, b.current)
-        return SearchResult(val, move, nodes)
+        if self.book is not None and b.variant.rules is RULES:
+            hit = self.book.probe(b)
+            if hit is not None:
+                move, value, depth = hit
+                return SearchResult(value, move, 0, depth)
+        # The TT is kept from earlier moves; entries from older searches age out first.
+        self.tt.new_search()
+        self.reset_ordering()
+        if time_ms is None:
+            time_ms = self.time_ms
+        pondered, self.pondered = self.pondered.get(b.key), {}
+        if pondered is not None and pondered.move in b.legal_moves():
+            if time_ms is None and pondered.depth >= self.depth:
+                return pondered
+            if time_ms is not None and not (self.workers > 1 and self.smp):
+                return self.iterative_deepening(b, time_ms, start=pondered)
+        if self.workers > 1 and self.smp:
+            if self._splitter is None:
+                from .parallel import LazySMP
+                self._splitter = LazySMP(self.workers, self.tt_mb, self.endgame)
+            return self._splitter.search(b, self.depth, time_ms)
+        if time_ms is not None:
+            return self.iterative_deepening(b, time_ms)
+        val, move, nodes = self._root_search(b, self.depth)
+        return SearchResult(val, move, nodes, self.depth)
+
+    def _root_search(self, b: Board, depth: int, deadline: Optional[float] = None,
+                     first: Optional[int] = None, alpha: float = -math.inf,
+                     beta: float = math.inf) -> Tuple[float, Optional[int], int]:
+        st = self._stats
+        if st is None:
+            return self._split_or_search(b, depth, deadline, first, alpha, beta)
+        t0 = time.perf_counter()
+        try:
+            out = self._split_or_search(b, depth, deadline, first, alpha, beta)
+            nodes = out[2]
+            return out
+        except SearchTimeout as e:
+            nodes = e.nodes
+            raise
+        finally:
+            st.nodes_per_depth[depth] = st.nodes_per_depth.get(depth, 0) + nodes
+            st.ms_per_depth[depth] = st.ms_per_depth.get(depth, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def _split_or_search(self, b: Board, depth: int, deadline: Optional[float], first: Optional[int],
+                         alpha: float, beta: float) -> Tuple[float, Optional[int], int]:
+        if self.workers <= 1:
+            return self.minimax(b, depth, alpha, beta, b.current, deadline=deadline, first=first)
+        if self._splitter is None:
+            from .parallel import RootSplitter
+            self._splitter = RootSplitter(self.workers, self.use_tt, self.tt_mb, self.endgame)
+        moves = self.order_moves(b, b.legal_moves(), 0, first)
+        return self._splitter.search(b, moves, depth, deadline, self.tt.generation)
+
+    def _aspiration_search(self, b: Board, depth: int, deadline: Optional[float],
+                           prev: SearchResult) -> Tuple[float, Optional[int], int]:
+        """Root search in a narrow window around the previous iteration's value,
+        widened and repeated while the result falls outside it."""
+        delta = ASPIRATION_WINDOW
+        lo, hi = prev.value - delta, prev.value + delta
+        nodes = 0
+        while True:
+            try:
+                val, move, n = self._root_search(b, depth, deadline, prev.move, lo, hi)
+            except SearchTimeout as e:
+                raise SearchTimeout(nodes + e.nodes)
+            nodes += n
+            if lo < val < hi:
+                return val, move, nodes
+            delta *= 4
+            if val <= lo:
+                lo = val - delta if delta < MAX_ASPIRATION else -math.inf
+            else:
+                hi = val + delta if delta < MAX_ASPIRATION else math.inf
+
+    def iterative_deepening(self, b: Board, time_ms: float, max_depth: int = MAX_DEPTH,
+                            start_depth: int = 1, start: Optional[SearchResult] = None) -> SearchResult:
+        """Search depth 1, 2, 3... until the deadline; return the last completed iteration.
+
+        `start` is an already completed result for b (e.g. from ponder()) to continue from.
+        """
+        deadline = time.perf_counter() + time_ms / 1000.0
+        if start is not None:
+            result = SearchResult(start.value, start.move, 0, start.depth)
+            start_depth = max(start_depth, start.depth + 1)
+        else:
+            result = SearchResult(self.evaluate(b, b.current), b.legal_moves()[0], 0)
+        total = 0
+        for depth in range(start_depth, max_depth + 1):
+            try:
+                if result.depth and self.workers <= 1:
+                    val, move, nodes = self._aspiration_search(b, depth, deadline, result)
+                else:
+                    val, move, nodes = self._root_search(b, depth, deadline, first=result.move)
+            except SearchTimeout as e:
+                total += e.nodes
+                break
+            total += nodes
+            result = SearchResult(val, move, total, depth)
+            if time.perf_counter() >= deadline:
+                break
+        result.nodes = total
+        return result
+
+    def ponder(self, b: Board, time_ms: Optional[float] = None, max_depth: int = MAX_DEPTH) -> None:
+        """Search the opponent's possible replies to b, one depth at a time for all of
+        them, until self.stop is set, the time budget runs out or max_depth is done.
+
+        Fills the TT and self.pondered for the next choose(): a reply searched deep
+        enough is answered at once, otherwise the search continues from it. The
+        likeliest replies (worst for us at the previous depth) go first.
+        """
+        self.pondered = {}
+        replies = reply_positions(b)
+        if not replies:
+            return
+        deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000.0
+        self.tt.new_search()
+        self.reset_ordering()
+        for depth in range(1, max_depth + 1):
+            for r in replies:
+                try:
+                    val, move, nodes = self.minimax(r, depth, -math.inf, math.inf, r.current, deadline=deadline)
+                except SearchTimeout:
+                    return
+                self.pondered[r.key] = SearchResult(val, move, nodes, depth)
+            replies.sort(key=lambda r: self.pondered[r.key].value)
@@ -0,0 +1,146 @@
+"""Vectorised engine that advances many games at once (needs numpy).
+
+BatchBoard holds N positions as an (N, 14) array plus a side-to-move vector
+and applies one move per game with array operations, using the same
+closed-form sowing as board.play(): every pit in the mover's 13-pit cycle
+gets the full laps and the next `rem` pits one more stone. Results match
+Board.apply_move exactly, including the skipped opponent store, captures,
+extra turns and the end-of-game sweep.
+
+Actions are per side: action a means pit a for player A and pit 7 + a for B.
+Only the standard Kalah(6, n) rules are supported, not other rules.Variant.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .board import Board
+from .rules import PITS_PER_SIDE, TOTAL_PITS, A_STORE, B_STORE, PLAYER_A, RULES
+
+_CYCLE = np.array(RULES.sow_cycle, dtype=np.intp)               # (2, 13) pit per cycle slot
+_POS = np.array(RULES.sow_pos, dtype=np.intp)                   # (2, 14) cycle slot per pit
+_STORE = np.array(RULES.stores, dtype=np.intp)
+_FIRST_PIT = np.array([0, PITS_PER_SIDE + 1], dtype=np.intp)    # pit of action 0 per player
+_SIDE_A = slice(0, PITS_PER_SIDE)
+_SIDE_B = slice(PITS_PER_SIDE + 1, PITS_PER_SIDE + 1 + PITS_PER_SIDE)
+
+class BatchBoard:
+    def __init__(self, pits: np.ndarray, current: np.ndarray):
+        self.pits = np.asarray(pits, dtype=np.int16)
+        self.current = np.asarray(current, dtype=np.int8)
+
+    @staticmethod
+    def new(n: int, start_stones: int = 4) -> "BatchBoard":
+        pits = np.tile(np.array(Board.new(start_stones).pits, dtype=np.int16), (n, 1))
+        return BatchBoard(pits, np.full(n, PLAYER_A, dtype=np.int8))
+
+    @staticmethod
+    def from_boards(boards: List[Board]) -> "BatchBoard":
+        if any(b.variant.rules is not RULES for b in boards):
+            raise ValueError("BatchBoard only plays the standard rules")
+        return BatchBoard(np.array([b.pits for b in boards]), np.array([b.current for b in boards]))
+
+    def to_boards(self) -> List[Board]:
+        return [Board([int(x) for x in row], int(c)) for row, c in zip(self.pits, self.current)]
+
+    def __len__(self) -> int:
+        return len(self.pits)
+
+    def copy(self) -> "BatchBoard":
+        return BatchBoard(self.pits.copy(), self.current.copy())
+
+    def _side_pits(self) -> np.ndarray:
+        """(N, 6) stones in each pit of the side to move."""
+        cols = _FIRST_PIT[self.current][:, None] + np.arange(PITS_PER_SIDE)
+        return np.take_along_axis(self.pits, cols, axis=1)
+
+    def legal_moves_mask(self) -> np.ndarray:
+        """(N, 6) bool: which actions are legal for the side to move."""
+        return self._side_pits() > 0
+
+    def terminal_mask(self) -> np.ndarray:
+        return (self.pits[:, _SIDE_A].sum(axis=1) + self.pits[:, _SIDE_B].sum(axis=1)) == 0
+
+    def scores(self) -> np.ndarray:
+        """(N, 2) store counts for A and B."""
+        return self.pits[:, [A_STORE, B_STORE]]
+
+    def apply_moves(self, actions: np.ndarray, active: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Play actions[i] in every active game; returns (extra_turn, ended) masks.
+
+        Games that are terminal, or not in `active`, are left untouched.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        n = len(self.pits)
+        act = ~self.terminal_mask() if active is None else np.asarray(active, dtype=bool) & ~self.terminal_mask()
+        extra = np.zeros(n, dtype=bool)
+        ended = np.zeros(n, dtype=bool)
+        rows = np.nonzero(act)[0]
+        if len(rows) == 0:
+            return extra, ended
+
+        pits = self.pits[rows].astype(np.int32)
+        player = self.current[rows].astype(np.intp)
+        a = actions[rows]
+        if np.any((a < 0) | (a >= PITS_PER_SIDE)):
+            raise ValueError("Action out of range")
+        r = np.arange(len(rows))
+        pit = _FIRST_PIT[player] + a
+        stones = pits[r, pit]
+        if np.any(stones == 0):
+            raise ValueError("Illegal move: empty pit")
+        pits[r, pit] = 0
+
+        # Closed-form sowing over the mover's cycle.
+        n_cycle = _CYCLE.shape[1]
+        laps, rem = np.divmod(stones, n_cycle)
+        start = _POS[player, pit]
+        k = (np.arange(n_cycle)[None, :] - start[:, None]) % n_cycle
+        k[k == 0] = n_cycle  # the origin pit is reached last in a lap
+        cycle = _CYCLE[player]
+        pits[r[:, None], cycle] += laps[:, None] + (k <= rem[:, None])
+        last = cycle[r, (start + rem) % n_cycle]
+
+        store = _STORE[player]
+        ext = last == store
+        # Capture: last stone in an empty pit on the mover's own side.
+        own_side = (last >= _FIRST_PIT[player]) & (last < _FIRST_PIT[player] + PITS_PER_SIDE)
+        opp = np.clip(TOTAL_PITS - 2 - last, 0, TOTAL_PITS - 1)
+        captured = pits[r, opp]
+        cap = ~ext & own_side & (pits[r, last] == 1) & (captured > 0)
+        cr = r[cap]
+        pits[cr, store[cap]] += captured[cap] + 1
+        pits[cr, last[cap]] = 0
+        pits[cr, opp[cap]] = 0
+
+        # End of game: a side is empty, everyone collects their own side.
+        side_a = pits[:, _SIDE_A].sum(axis=1)
+        side_b = pits[:, _SIDE_B].sum(axis=1)
+        end = (side_a == 0) | (side_b == 0)
+        pits[end, A_STORE] += side_a[end]
+        pits[end, B_STORE] += side_b[end]
+        pits[end, _SIDE_A] = 0
+        pits[end, _SIDE_B] = 0
+
+        self.pits[rows] = pits
+        switch = ~ext & ~end
+        self.current[rows[switch]] = 1 - self.current[rows[switch]]
+        extra[rows] = ext
+        ended[rows] = end
+        return extra, ended
+
+    def random_actions(self, rng: np.random.Generator) -> np.ndarray:
+        """A uniformly random legal action per game (0 where none is legal)."""
+        noise = rng.random((len(self.pits), PITS_PER_SIDE))
+        noise[~self.legal_moves_mask()] = -1.0
+        return noise.argmax(axis=1)
+
+    def rollout(self, rng: np.random.Generator) -> np.ndarray:
+        """Play random moves until every game ends; returns final A - B store differences."""
+        while True:
+            live = ~self.terminal_mask()
+            if not live.any():
+                break
+            self.apply_moves(self.random_actions(rng), live)
+        s = self.scores().astype(np.int32)
+        return s[:, 0] - s[:, 1]
@@ -0,0 +1,197 @@
+"""Micro-benchmarks for the engine hot paths, with stored baselines.
+
+Every benchmark runs over the same corpus of positions, taken from seeded
+random games, and reports the best of several rounds:
+
+    apply_move, clone, legal_moves, zobrist_hash, evaluate    ns per call
+    evaluate_packed                                           ns per call, on PackedBoards
+    choose_d4, choose_d6                                      ns per node, NPS, peak memory
+
+    python -m mancala.bench                       # print results
+    python -m mancala.bench --save bench.json     # record a baseline
+    python -m mancala.bench --check               # exit 1 on a regression vs bench_baseline.json
+
+A benchmark regresses when its ns/op, or for choose_* its peak memory
+(the search's own, not the preallocated transposition table), grows by more
+than --threshold (default 25%) over the baseline. Timings only compare on the same machine,
+so re-record the baseline with --save when moving to another one.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from .ai import AI
+from .board import Board
+from .packed import PackedBoard
+from .tt import ZOBRIST
+
+DEFAULT_THRESHOLD = 0.25
+CHOOSE_DEPTHS = (4, 6)
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_baseline.json")
+# Minimum length of one timed round of a micro-benchmark.
+ROUND_NS = 50_000_000
+
+def corpus(n: int = 40, seed: int = 2024, stones: int = 4) -> List[Board]:
+    """n non-terminal positions from seeded random games, spread over all phases."""
+    rnd = random.Random(seed)
+    out = []
+    while len(out) < n:
+        b = Board.new(stones)
+        while not b.terminal():
+            if rnd.random() < 0.15:
+                out.append(b.clone())
+            b.apply_move(rnd.choice(b.legal_moves()))
+    return out[:n]
+
+def _best_ns(run: Callable[[], int], rounds: int) -> float:
+    """Best ns per op over `rounds` calls of run(), which returns how many ops it did."""
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        t0 = time.perf_counter_ns()
+        ops = run()
+        best = min(best, (time.perf_counter_ns() - t0) / ops)
+    return best
+
+def _micro(positions: List[Board], rounds: int) -> Dict[str, dict]:
+    ai = AI(use_tt=False, tt_mb=0)
+    pairs = [(b, m) for b in positions for m in b.legal_moves()]
+
+    def apply_move() -> int:
+        for b, m in pairs:
+            _, _, u = b.apply_move(m, undo=True)
+            b.unmake(u)
+        return len(pairs)
+
+    def clone() -> int:
+        for b in positions:
+            b.clone()
+        return len(positions)
+
+    def legal_moves() -> int:
+        for b in positions:
+            b.legal_moves()
+        return len(positions)
+
+    def zobrist_hash() -> int:
+        h = ZOBRIST.hash
+        for b in positions:
+            h(b)
+        return len(positions)
+
+    def evaluate() -> int:
+        for b in positions:
+            ai.evaluate(b, b.current)
+        return len(positions)
+
+    # The search evaluates PackedBoards, whose occupancy is kept up to date.
+    packed = [PackedBoard.from_board(b) for b in positions]
+
+    def evaluate_packed() -> int:
+        for b in packed:
+            ai.evaluate(b, b.current)
+        return len(packed)
+
+    out = {}
+    for name, fn in (("apply_move", apply_move), ("clone", clone), ("legal_moves", legal_moves),
+                     ("zobrist_hash", zobrist_hash), ("evaluate", evaluate),
+                     ("evaluate_packed", evaluate_packed)):
+        # Repeat fn enough times per round for timer and scheduler noise to even out.
+        t0 = time.perf_counter_ns()
+        fn()
+        loops = max(1, ROUND_NS // max(1, time.perf_counter_ns() - t0))
+        out[name] = {"ns_per_op": _best_ns(lambda: sum(fn() for _ in range(loops)), rounds)}
+    return out
+
+def _choose(positions: List[Board], depth: int, rounds: int) -> dict:
+    def run(ai: Optional[AI] = None) -> int:
+        ai = AI(depth=depth) if ai is None else ai
+        return sum(ai.choose(b.clone()).nodes for b in positions)
+
+    ns = _best_ns(run, rounds)
+    # Build the AI before tracing so the peak is the search's own memory, not
+    # the transposition table allocated up front.
+    ai = AI(depth=depth)
+    tracemalloc.start()
+    try:
+        run(ai)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"ns_per_op": ns, "nps": 1e9 / ns, "peak_kb": peak / 1024}
+
+def run(rounds: int = 5, positions: Optional[List[Board]] = None, choose_positions: int = 8,
+        depths=CHOOSE_DEPTHS) -> Dict[str, dict]:
+    """All benchmarks by name; each has ns_per_op, choose_* also nps and peak_kb."""
+    positions = corpus() if positions is None else positions
+    results = _micro(positions, rounds)
+    for d in depths:
+        results[f"choose_d{d}"] = _choose(positions[:choose_positions], d, max(1, rounds // 2))
+    return results
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Descriptions of benchmarks more than `threshold` slower (or, for choose_*, bigger) than the baseline."""
+    slow = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = r["ns_per_op"] / base["ns_per_op"]
+        if ratio > 1 + threshold:
+            slow.append(f"{name}: {r['ns_per_op']:.0f} ns/op vs baseline {base['ns_per_op']:.0f} "
+                        f"({(ratio - 1) * 100:+.0f}%)")
+        if "peak_kb" in r and "peak_kb" in base:
+            ratio = r["peak_kb"] / base["peak_kb"]
+            if ratio > 1 + threshold:
+                slow.append(f"{name}: {r['peak_kb']:,.0f} KiB peak vs baseline {base['peak_kb']:,.0f} "
+                            f"({(ratio - 1) * 100:+.0f}%)")
+    return slow
+
+def format_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> str:
+    lines = []
+    for name, r in results.items():
+        line = f"{name:14s} {r['ns_per_op']:12.1f} ns/op"
+        if "nps" in r:
+            line += f" {r['nps']:12,.0f} nodes/s {r['peak_kb']:10,.0f} KiB peak"
+        if baseline and name in baseline:
+            line += f"  ({(r['ns_per_op'] / baseline[name]['ns_per_op'] - 1) * 100:+.1f}%)"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the engine hot paths.")
+    p.add_argument('--rounds', type=int, default=5, help='Repeats per benchmark; the best is kept')
+    p.add_argument('--save', nargs='?', const=BASELINE, default=None,
+                   help='Write results as a baseline JSON file (default bench_baseline.json)')
+    p.add_argument('--check', nargs='?', const=BASELINE, default=None,
+                   help='Baseline JSON file to compare against (default bench_baseline.json)')
+    p.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                   help='Allowed slowdown before --check fails (0.25 = 25%%)')
+    args = p.parse_args()
+
+    results = run(args.rounds)
+    baseline = None
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({k: {f: round(x, 1) for f, x in v.items()} for k, v in results.items()},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+    if baseline is not None:
+        slow = compare(results, baseline, args.threshold)
+        for s in slow:
+            print("REGRESSION", s, file=sys.stderr)
+        sys.exit(1 if slow else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,77 +1,231 @@
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
-from .rules import (PITS_PER_SIDE, TOTAL_PITS, A_STORE, B_STORE, PLAYER_A, PLAYER_B,
-                    pit_range, own_store, opp_store, opposite, other)
+from dataclasses import dataclass, field
+from typing import List, NamedTuple, Tuple, Optional, Sequence
+from .rules import PLAYER_A, RULES, RuleTables, Variant, KALAH
+from .tt import ZOBRIST, Zobrist, zobrist_for
 
-@dataclass
+@dataclass(slots=True)
 class Board:
     pits: List[int]
     current: int = PLAYER_A
+    # Rules the game is played by; pits must match its board size.
+    variant: Variant = field(default=KALAH, repr=False, compare=False)
 
     @staticmethod
-    def new(start_stones: int = 4) -> "Board":
-        pits = [start_stones]*PITS_PER_SIDE + [0] + [start_stones]*PITS_PER_SIDE + [0]
-        return Board(pits, PLAYER_A)
+    def new(start_stones: Optional[int] = None, variant: Variant = KALAH) -> "Board":
+        """Starting position; start_stones per pit overrides variant.seeds."""
+        return Board(variant.start_pits(start_stones), PLAYER_A, variant)
 
     def clone(self) -> "Board":
-        return Board(self.pits.copy(), self.current)
+        return Board(self.pits.copy(), self.current, self.variant)
+
+    @property
+    def key(self) -> int:
+        """Zobrist key of this position, computed from the pits.
+
+        Board reads its pits directly, so they may be edited in place; PackedBoard
+        keeps the key up to date move by move for the search instead.
+        """
+        return self.zob.hash(self)
+
+    @property
+    def occ(self) -> int:
+        """Occupancy of the pits (see rules.OCC_A_TOTAL), computed from them like key."""
+        return self.variant.rules.occupancy(self.pits)
+
+    @property
+    def zob(self) -> Zobrist:
+        """Zobrist table sized to the stones on the board, which key is computed with."""
+        return zobrist_for(sum(self.pits), len(self.pits))
 
     def legal_moves(self) -> List[int]:
-        rng = pit_range(self.current)
-        return [i for i in rng if self.pits[i] > 0]
+        pits = self.pits
+        return [i for i in self.variant.rules.sides[self.current] if pits[i]]
 
     def side_empty(self, player: int) -> bool:
-        rng = pit_range(player)
-        return all(self.pits[i] == 0 for i in rng)
+        return side_empty(self.pits, player, self.variant.rules)
+
+    def side_total(self, player: int) -> int:
+        """Stones in the player's pits, not counting the store."""
+        return sum(self.pits[self.variant.rules.side_slices[player]])
 
-    def apply_move(self, pit_index: int) -> Tuple[bool, Optional[str]]:
+    def apply_move(self, pit_index: int, undo: bool = False):
+        """Play pit_index; returns (extra_turn, end_reason).
+
+        With undo=True returns (extra_turn, end_reason, record) where record can
+        be passed to unmake() to restore the position in place.
+        """
         player = self.current
-        if pit_index not in pit_range(player):
+        rt = self.variant.rules
+        if pit_index not in rt.sides[player]:
             raise AssertionError("Pit not on current player's side")
-        stones = self.pits[pit_index]
-        if stones == 0:
+        if self.pits[pit_index] == 0:
             raise ValueError("Illegal move: empty pit")
-        self.pits[pit_index] = 0
-
-        idx = pit_index
-        while stones > 0:
-            idx = (idx + 1) % TOTAL_PITS
-            if idx == opp_store(player):
-                continue
-            self.pits[idx] += 1
-            stones -= 1
-
-        extra_turn = (idx == own_store(player))
-
-        # Capture
-        if (not extra_turn) and (idx in pit_range(player)) and self.pits[idx] == 1:
-            opp_idx = opposite(idx)
-            captured = self.pits[opp_idx]
-            if captured > 0:
-                self.pits[own_store(player)] += captured + 1
-                self.pits[idx] = 0
-                self.pits[opp_idx] = 0
-
-        end_reason = None
-        if self.side_empty(PLAYER_A) or self.side_empty(PLAYER_B):
-            for i in pit_range(PLAYER_A):
-                self.pits[A_STORE] += self.pits[i]
-                self.pits[i] = 0
-            for i in pit_range(PLAYER_B):
-                self.pits[B_STORE] += self.pits[i]
-                self.pits[i] = 0
-            end_reason = "side_empty"
-
+        # Board keeps no running key, so play() hashes from 0 and the result is dropped.
+        extra_turn, end_reason, _, _, record = play(self.pits, player, pit_index, 0, self.zob, rt)
         if not extra_turn and end_reason is None:
-            self.current = other(player)
+            self.current = rt.other[player]
+        if undo:
+            return extra_turn, end_reason, record
         return extra_turn, end_reason
 
+    def unmake(self, record: "Undo") -> None:
+        unplay(self.pits, record, self.variant.rules)
+        self.current = record.player
+
     def score(self, player: int) -> int:
-        return self.pits[own_store(player)]
+        return self.pits[self.variant.rules.stores[player]]
 
     def terminal(self) -> bool:
-        nonstores = sum(self.pits[i] for i in range(TOTAL_PITS) if i not in (A_STORE, B_STORE))
-        return nonstores == 0
+        pits = self.pits
+        a, b = self.variant.rules.stores
+        return sum(pits) == pits[a] + pits[b]
 
     def as_tuple(self):
         return tuple(self.pits) + (self.current,)
+
+
+class Undo(NamedTuple):
+    """What play() changed, enough for unplay() to reverse it."""
+    pit: int
+    stones: int
+    captured: int                   # stones taken by a Kalah capture from the opposite pit, 0 if none
+    swept: Optional[Sequence[int]]  # copy of the pits before another capture or the end sweep, else None
+    player: int                     # side to move before the move
+    key: int                        # Zobrist key passed to play(), the key before the move
+    occ: Optional[int]              # occupancy before the move, None if not tracked
+
+def play(pits, player: int, pit_index: int, h: int, zob: Zobrist = ZOBRIST,
+         rt: RuleTables = RULES, occ: Optional[int] = None) -> Tuple[bool, Optional[str], int, int, Undo]:
+    """Apply a legal move to a board's pit sequence in place, under the rules in rt.
+
+    Works on any mutable int sequence (Board's list, PackedBoard's bytearray or array).
+    Returns (extra_turn, end_reason, h, occ, undo) where h is the Zobrist key
+    updated for the changed pits and, when the turn passes, the side to move,
+    and occ the occupancy (rules.OCC_A_TOTAL) updated from the one passed in
+    (None when none was); zob must be large enough for the stones on the board.
+    """
+    zt = zob.table
+    h0 = h
+    occ0 = occ
+    track = occ is not None
+    stones = pits[pit_index]
+    h ^= zt[pit_index][stones] ^ zt[pit_index][0]
+    pits[pit_index] = 0
+
+    # Sow arithmetically: every pit in the cycle gets `laps` stones and the
+    # `rem` pits after the origin one more; the last stone lands rem pits on.
+    cycle = rt.sow_cycle[player]
+    n = rt.cycle_len
+    laps, rem = divmod(stones, n)
+    start = rt.sow_pos[player][pit_index]
+    for k in range(1, (n if laps else rem) + 1):
+        i = cycle[(start + k) % n]
+        s = pits[i]
+        pits[i] = s2 = s + laps + (k <= rem)
+        h ^= zt[i][s] ^ zt[i][s2]
+    idx = cycle[(start + rem) % n]
+    unit = rt.total_unit
+    if track:
+        occ -= stones * unit[player]
+        if laps:
+            occ = (occ | rt.side_bits[0] | rt.side_bits[1]) + laps * rt.lap_gain + rt.sow_gain[player][pit_index][rem]
+        else:
+            occ = ((occ ^ rt.bit[pit_index]) | rt.sow_bits[player][pit_index][rem]) + rt.sow_gain[player][pit_index][rem]
+
+    store = rt.stores[player]
+    extra_turn = (idx == store)
+
+    # Capture
+    captured = 0
+    swept = None
+    if extra_turn:
+        pass
+    elif rt.own_pit[player][idx]:
+        if rt.kalah_capture and pits[idx] == 1:
+            opp_idx = rt.opposite[idx]
+            captured = pits[opp_idx]
+            if captured:
+                s = pits[store]
+                pits[store] = s2 = s + captured + 1
+                pits[idx] = 0
+                pits[opp_idx] = 0
+                h ^= zt[store][s] ^ zt[store][s2] ^ zt[idx][1] ^ zt[idx][0] ^ zt[opp_idx][captured] ^ zt[opp_idx][0]
+                if track:
+                    occ = (occ ^ rt.bit[idx] ^ rt.bit[opp_idx]) - unit[player] - captured * unit[1 - player]
+            elif rt.empty_capture:
+                swept = pits[:]
+                s = pits[store]
+                pits[store] = s + 1
+                pits[idx] = 0
+                h ^= zt[store][s] ^ zt[store][s + 1] ^ zt[idx][1] ^ zt[idx][0]
+                if track:
+                    occ = (occ ^ rt.bit[idx]) - unit[player]
+    elif rt.oware_capture:
+        # Oware: take the last pit and the opponent pits sown just before it
+        # while they hold 2 or 3, unless that takes every stone they have.
+        opp = rt.other[player]
+        taken = []
+        k, i = rem, idx
+        while rt.own_pit[opp][i] and 2 <= pits[i] <= 3:
+            taken.append(i)
+            k -= 1
+            i = cycle[(start + k) % n]
+        if taken and sum(pits[i] for i in taken) < sum(pits[rt.side_slices[opp]]):
+            swept = pits[:]
+            s = pits[store]
+            for i in taken:
+                h ^= zt[i][pits[i]] ^ zt[i][0]
+                if track:
+                    occ = (occ ^ rt.bit[i]) - pits[i] * unit[opp]
+                pits[store] += pits[i]
+                pits[i] = 0
+            h ^= zt[store][s] ^ zt[store][pits[store]]
+
+    end_reason = None
+    if track:
+        a_empty = not occ & rt.side_bits[0]
+        b_empty = not occ & rt.side_bits[1]
+    else:
+        a_empty = not any(pits[rt.side_slices[0]])
+        b_empty = not any(pits[rt.side_slices[1]])
+    if a_empty or b_empty:
+        if swept is None:
+            swept = pits[:]
+        # Who collects each side's remaining stones.
+        takers = rt.stores if rt.sweep_own else (rt.stores[0 if a_empty else 1],) * 2
+        for side, st in zip(rt.sides, takers):
+            s = pits[st]
+            for i in side:
+                if pits[i]:
+                    h ^= zt[i][pits[i]] ^ zt[i][0]
+                    pits[st] += pits[i]
+                    pits[i] = 0
+            h ^= zt[st][s] ^ zt[st][pits[st]]
+        if track:
+            occ = 0
+        end_reason = "side_empty"
+
+    if not extra_turn and end_reason is None:
+        h ^= zob.turn_key
+    return extra_turn, end_reason, h, occ, Undo(pit_index, stones, captured, swept, player, h0, occ0)
+
+def unplay(pits, u: Undo, rt: RuleTables = RULES) -> None:
+    """Reverse play() in place: other captures and the sweep, then a Kalah capture, then sowing."""
+    if u.swept is not None:
+        pits[:] = u.swept
+    cycle = rt.sow_cycle[u.player]
+    n = rt.cycle_len
+    laps, rem = divmod(u.stones, n)
+    start = rt.sow_pos[u.player][u.pit]
+    if u.captured:
+        idx = cycle[(start + rem) % n]
+        pits[rt.stores[u.player]] -= u.captured + 1
+        pits[idx] = 1
+        pits[rt.opposite[idx]] = u.captured
+    for k in range(1, (n if laps else rem) + 1):
+        pits[cycle[(start + k) % n]] -= laps + (k <= rem)
+    pits[u.pit] = u.stones
+
+def side_empty(pits, player: int, rt: RuleTables = RULES) -> bool:
+    """From the pits themselves; PackedBoard answers from its occupancy."""
+    return not any(pits[rt.side_slices[player]])
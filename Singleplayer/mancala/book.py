@@ -0,0 +1,131 @@
+"""Opening book: best moves for the first plies from the start position.
+
+Every position reachable in the first K plies is searched deeply offline and
+its best move and value are stored by Zobrist key. As in the search, a move
+that earns an extra turn does not use up a ply, so whole extra-turn chains
+are covered. The book is saved in the dbfile format (kind b"BOOK"): a sorted
+array of keys followed by one packed entry per key.
+
+    python -m mancala.book --plies 4 --depth 10 --out book4.db
+"""
+import argparse
+import bisect
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .board import Board
+from .dbfile import TableFile, write_table
+
+# Values are stored as fixed-point milli-units in the high 32 bits of an entry.
+VALUE_SCALE = 1000
+
+def _pack(move: int, value: float, depth: int) -> int:
+    return move | (depth << 8) | ((round(value * VALUE_SCALE) & 0xFFFFFFFF) << 32)
+
+def _unpack(entry: int) -> Tuple[int, float, int]:
+    v = entry >> 32
+    if v >= 1 << 31:
+        v -= 1 << 32
+    return entry & 0xFF, v / VALUE_SCALE, (entry >> 8) & 0xFFFFFF
+
+def opening_positions(start_stones: int, plies: int) -> List[Board]:
+    """Positions reached from Board.new(start_stones) within `plies` changes of side."""
+    seen: Dict[int, Board] = {}
+    # 0-1 BFS: extra-turn children stay on the same ply, so each position is
+    # first reached at its smallest ply.
+    frontier = deque([(Board.new(start_stones), 0)])
+    while frontier:
+        b, ply = frontier.popleft()
+        if b.key in seen or b.terminal():
+            continue
+        seen[b.key] = b
+        for m in b.legal_moves():
+            child = b.clone()
+            extra, _ = child.apply_move(m)
+            if extra:
+                frontier.appendleft((child, ply))
+            elif ply + 1 < plies:
+                frontier.append((child, ply + 1))
+    return list(seen.values())
+
+class OpeningBook:
+    KIND = b"BOOK"
+
+    def __init__(self, start_stones: int, keys, entries):
+        self.start_stones = start_stones
+        self.keys = keys          # sorted Zobrist keys
+        self.entries = entries    # packed (move, value, depth) per key
+        self.file: Optional[TableFile] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def build(start_stones: int = 4, plies: int = 4, depth: int = 10,
+              time_ms: Optional[float] = None, workers: int = 1, log=None) -> "OpeningBook":
+        from .ai import AI
+        ai = AI(depth=depth, time_ms=time_ms, workers=workers)
+        found = {}
+        try:
+            todo = opening_positions(start_stones, plies)
+            for n, b in enumerate(todo, 1):
+                res = ai.choose(b)
+                found[b.key] = _pack(res.move, res.value, res.depth)
+                if log is not None:
+                    log(f"[{n}/{len(todo)}] {b.pits} to move {b.current}: "
+                        f"pit {res.move} value {res.value:.2f} depth {res.depth}")
+        finally:
+            ai.close()
+        keys = array('Q', sorted(found))
+        return OpeningBook(start_stones, keys, array('Q', (found[k] for k in keys)))
+
+    def save(self, path: str) -> None:
+        write_table(path, self.KIND, self.start_stones, array('Q', self.keys) + array('Q', self.entries))
+
+    @staticmethod
+    def load(path: str, verify: bool = True) -> "OpeningBook":
+        f = TableFile(path, OpeningBook.KIND, verify)
+        n = len(f.values) // 2
+        book = OpeningBook(f.max_stones, f.values[:n], f.values[n:])
+        book.file = f
+        return book
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.keys.release()
+            self.entries.release()
+            self.file.close()
+
+    def __reduce__(self):
+        if self.file is not None:
+            return (OpeningBook.load, (self.file.path, False))
+        return (OpeningBook, (self.start_stones, self.keys, self.entries))
+
+    def probe(self, b: Board) -> Optional[Tuple[int, float, int]]:
+        """(move, value, depth searched) for this position, or None if not in the book."""
+        key = b.key
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        move, value, depth = _unpack(self.entries[i])
+        # Guard against a key collision with a position outside the book.
+        if move not in b.legal_moves():
+            return None
+        return move, value, depth
+
+def main():
+    p = argparse.ArgumentParser(description="Build an opening book by deep search.")
+    p.add_argument('--stones', type=int, default=4)
+    p.add_argument('--plies', type=int, default=4)
+    p.add_argument('--depth', type=int, default=10)
+    p.add_argument('--time-ms', type=float, default=None, help='Per-position time budget instead of a fixed depth')
+    p.add_argument('--workers', type=int, default=1)
+    p.add_argument('--out', required=True)
+    args = p.parse_args()
+    book = OpeningBook.build(args.stones, args.plies, args.depth, args.time_ms, args.workers, log=print)
+    book.save(args.out)
+    print(f"Wrote {len(book)} positions to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""On-disk format for precomputed position tables, opened with mmap.
+
+A file is a fixed 64-byte header followed by a flat array of values:
+
+    magic      8s   b"MANCALA\\0"
+    version    H    FORMAT_VERSION
+    header     H    header size (64)
+    kind       4s   table kind, e.g. b"EGDB" for the endgame database
+    typecode   c    array typecode of the values, e.g. b"b" for int8
+    max_stones H    largest stones in play covered (start stones per pit for a book)
+    count      Q    number of values
+    data_crc   I    zlib.crc32 of the values
+    header_crc I    zlib.crc32 of the header fields above
+
+Values are addressed by index(): a combinatorial ranking of the 12 playing
+pits grouped by stones in play, times two for the side to move. Opening the
+file maps it read-only, so every process that opens the same file shares one
+page-cached copy instead of loading its own.
+"""
+import mmap
+import struct
+import zlib
+from array import array
+from math import comb
+from typing import Optional
+
+from .rules import TOTAL_PITS, A_STORE, B_STORE
+
+MAGIC = b"MANCALA\0"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+_FIELDS = struct.Struct("<8sHH4scHQI")
+_HEADER_CRC = struct.Struct("<I")
+
+PLAY_PITS = tuple(i for i in range(TOTAL_PITS) if i not in (A_STORE, B_STORE))
+
+def positions(max_stones: int) -> int:
+    """Number of (pits, side to move) positions with up to max_stones in play."""
+    return 2 * comb(max_stones + len(PLAY_PITS), len(PLAY_PITS))
+
+def index(pits, current: int) -> int:
+    """Combinatorial rank of a position among all with at most as many stones in play.
+
+    Positions are ordered by stones in play n, then by the stars-and-bars
+    rank of the 12-pit composition of n, then by side to move.
+    """
+    n = sum(pits[i] for i in PLAY_PITS)
+    k = len(PLAY_PITS)
+    rank = comb(n + k - 1, k)  # compositions with fewer stones
+    r = n
+    for j, i in enumerate(PLAY_PITS[:-1]):
+        m = k - j
+        x = pits[i]
+        # compositions of r over the remaining m pits whose first pit holds < x
+        rank += comb(r + m - 1, m - 1) - comb(r - x + m - 1, m - 1)
+        r -= x
+    return 2 * rank + current
+
+def stones_in_play(pits) -> int:
+    return sum(pits) - pits[A_STORE] - pits[B_STORE]
+
+def write_table(path: str, kind: bytes, max_stones: int, values: array) -> None:
+    data = values.tobytes()
+    fields = _FIELDS.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE, kind, values.typecode.encode(),
+                          max_stones, len(values), zlib.crc32(data))
+    header = fields + _HEADER_CRC.pack(zlib.crc32(fields))
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(data)
+
+class TableFile:
+    """Read-only, memory-mapped view of a table written by write_table()."""
+    def __init__(self, path: str, kind: Optional[bytes] = None, verify: bool = True):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse(kind, verify)
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _parse(self, kind: Optional[bytes], verify: bool) -> None:
+        mm = self._mm
+        if len(mm) < HEADER_SIZE or mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: not a mancala table file")
+        fields = mm[:_FIELDS.size]
+        magic, version, header_size, file_kind, typecode, max_stones, count, data_crc = _FIELDS.unpack(fields)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: format version {version}, expected {FORMAT_VERSION}")
+        (header_crc,) = _HEADER_CRC.unpack_from(mm, _FIELDS.size)
+        if header_crc != zlib.crc32(fields):
+            raise ValueError(f"{self.path}: header checksum mismatch")
+        if kind is not None and file_kind != kind:
+            raise ValueError(f"{self.path}: table kind {file_kind!r}, expected {kind!r}")
+        self.kind = file_kind
+        self.max_stones = max_stones
+        self.values = memoryview(mm)[header_size:].cast(typecode.decode())
+        if len(self.values) != count:
+            self.values.release()
+            raise ValueError(f"{self.path}: expected {count} values, found a truncated file")
+        if verify and zlib.crc32(self.values) != data_crc:
+            self.values.release()
+            raise ValueError(f"{self.path}: data checksum mismatch")
+
+    def lookup(self, b) -> Optional[int]:
+        """Value stored for this Board (or anything with pits/current), None if not covered."""
+        if stones_in_play(b.pits) > self.max_stones:
+            return None
+        return self.values[index(b.pits, b.current)]
+
+    def close(self) -> None:
+        self.values.release()
+        self._mm.close()
+
+    def __reduce__(self):
+        # Other processes reopen (and so share) the mapping rather than copying it.
+        return (TableFile, (self.path, self.kind, False))
@@ -0,0 +1,137 @@
+"""Exact endgame values for positions with few stones left in the pits.
+
+Only the 12 playing pits and the side to move matter for how the rest of the
+game goes, so a position's value is stored as the best (own store gain -
+opponent store gain) from here on, for the side to move. Stones only ever
+leave the pits, and a move that keeps them all in play pushes them towards
+the mover's store, so positions form a DAG ordered by stones in play: the
+solver fills levels 0, 1, 2... N, each move landing in an already solved
+position or a later one on the same level.
+
+    python -m mancala.endgame --stones 8 --out endgame8.db
+"""
+import argparse
+import sys
+from array import array
+from typing import List, Optional
+
+from .rules import TOTAL_PITS, A_STORE, B_STORE, PLAYER_A, PLAYER_B, pit_range, own_store, opp_store, other
+from .board import play
+from .tt import zobrist_for
+from .dbfile import PLAY_PITS, TableFile, index, positions, stones_in_play, write_table
+
+UNKNOWN = -128  # int8 sentinel, so at most 127 stones in play
+
+def compositions(n: int, k: int):
+    if k == 1:
+        yield (n,)
+        return
+    for x in range(n, -1, -1):
+        for rest in compositions(n - x, k - 1):
+            yield (x,) + rest
+
+def solve(max_stones: int) -> array:
+    """Values for every position with up to max_stones in play, indexed by index()."""
+    if max_stones > 127:
+        raise ValueError("At most 127 stones in play fit the int8 table")
+    values = array('b', [UNKNOWN]) * positions(max_stones)
+    zob = zobrist_for(max_stones)  # keys are unused, but play() looks them up
+
+    def value(pits: List[int], player: int) -> int:
+        idx = index(pits, player)
+        v = values[idx]
+        if v != UNKNOWN:
+            return v
+        moves = [i for i in pit_range(player) if pits[i]]
+        if not moves:
+            # Unreachable in play (the sweep happens first); score it as that sweep.
+            v = -sum(pits[i] for i in pit_range(other(player)))
+        else:
+            v = None
+            for m in moves:
+                child = pits.copy()
+                extra, end, _, _, _ = play(child, player, m, 0, zob)
+                gain = child[own_store(player)] - child[opp_store(player)]
+                if end is None:
+                    child[A_STORE] = child[B_STORE] = 0
+                    rest = value(child, player if extra else other(player))
+                    gain += rest if extra else -rest
+                if v is None or gain > v:
+                    v = gain
+        values[idx] = v
+        return v
+
+    # value() recurses along chains of same-level moves; restore the limit afterwards.
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 20 * max_stones * len(PLAY_PITS) + 1000))
+    try:
+        for n in range(max_stones + 1):
+            for comp in compositions(n, len(PLAY_PITS)):
+                pits = [0] * TOTAL_PITS
+                for i, x in zip(PLAY_PITS, comp):
+                    pits[i] = x
+                value(pits, PLAYER_A)
+                value(pits, PLAYER_B)
+    finally:
+        sys.setrecursionlimit(limit)
+    return values
+
+class EndgameDB:
+    """Endgame values by position; in memory after build(), memory-mapped after load()."""
+    KIND = b"EGDB"
+
+    def __init__(self, max_stones: int, values):
+        self.max_stones = max_stones
+        self.values = values
+        self.file: Optional[TableFile] = None
+
+    @staticmethod
+    def build(max_stones: int) -> "EndgameDB":
+        return EndgameDB(max_stones, solve(max_stones))
+
+    def save(self, path: str) -> None:
+        write_table(path, self.KIND, self.max_stones, array('b', self.values))
+
+    @staticmethod
+    def load(path: str, verify: bool = True) -> "EndgameDB":
+        f = TableFile(path, EndgameDB.KIND, verify)
+        db = EndgameDB(f.max_stones, f.values)
+        db.file = f
+        return db
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+    def __reduce__(self):
+        # Worker processes map the same file instead of receiving a copy.
+        if self.file is not None:
+            return (EndgameDB.load, (self.file.path, False))
+        return (EndgameDB, (self.max_stones, self.values))
+
+    def probe(self, b) -> Optional[int]:
+        """Best future store difference for the side to move, or None if too many stones."""
+        if stones_in_play(b.pits) > self.max_stones:
+            return None
+        return self.values[index(b.pits, b.current)]
+
+    def final_diff(self, b, player: int) -> Optional[int]:
+        """Exact final (player store - opponent store) under perfect play, or None."""
+        v = self.probe(b)
+        if v is None:
+            return None
+        mover = b.current
+        diff = b.pits[own_store(mover)] - b.pits[opp_store(mover)] + v
+        return diff if mover == player else -diff
+
+def main():
+    p = argparse.ArgumentParser(description="Solve all positions with few stones in play.")
+    p.add_argument('--stones', type=int, default=8, help='Maximum stones left in the pits')
+    p.add_argument('--out', required=True)
+    args = p.parse_args()
+    db = EndgameDB.build(args.stones)
+    db.save(args.out)
+    print(f"Wrote {len(db.values)} positions (up to {args.stones} stones in play) to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,36 @@
-from typing import List, Tuple
-from .board import Board
+from typing import List, Optional, Tuple, Union
+from .board import Board, Undo
 
 class History:
+    """Undo/redo stacks.
+
+    Moves played through apply_move() are kept as compact Undo records (redo
+    replays the pit); push() still records a full snapshot of the board.
+    """
     def __init__(self):
-        self.undo_stack: List[Tuple[list[int], int]] = []
-        self.redo_stack: List[Tuple[list[int], int]] = []
+        self.undo_stack: List[Union[Undo, Tuple[list[int], int]]] = []
+        self.redo_stack: List[Union[int, Tuple[list[int], int]]] = []
 
     def push(self, board: Board) -> None:
         self.undo_stack.append((board.pits.copy(), board.current))
         self.redo_stack.clear()
 
+    def apply_move(self, board: Board, pit_index: int) -> Tuple[bool, Optional[str]]:
+        extra_turn, end_reason, record = board.apply_move(pit_index, undo=True)
+        self.undo_stack.append(record)
+        self.redo_stack.clear()
+        return extra_turn, end_reason
+
     def undo(self, board: Board) -> bool:
         if not self.undo_stack:
             return False
+        entry = self.undo_stack.pop()
+        if isinstance(entry, Undo):
+            board.unmake(entry)
+            self.redo_stack.append(entry.pit)
+            return True
         self.redo_stack.append((board.pits.copy(), board.current))
-        pits, cur = self.undo_stack.pop()
+        pits, cur = entry
         board.pits = pits
         board.current = cur
         return True
@@ -22,8 +38,12 @@ class History:
     def redo(self, board: Board) -> bool:
         if not self.redo_stack:
             return False
+        entry = self.redo_stack.pop()
+        if isinstance(entry, int):
+            self.undo_stack.append(board.apply_move(entry, undo=True)[2])
+            return True
         self.undo_stack.append((board.pits.copy(), board.current))
-        pits, cur = self.redo_stack.pop()
+        pits, cur = entry
         board.pits = pits
         board.current = cur
         return True
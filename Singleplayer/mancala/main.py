@@ -1,16 +1,27 @@
 import argparse
 from .ui import run_cli, run_gui
+from .rules import Variant, KALAH
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--gui', action='store_true', help='Run with game2dboard GUI')
     p.add_argument('--depth', type=int, default=6)
-    p.add_argument('--stones', type=int, default=4)
+    p.add_argument('--variant', type=Variant.parse, default=KALAH,
+                   help='Rules as PITSxSEEDS[,empty-capture][,oware][,sweep-emptied] (default 6x4)')
+    p.add_argument('--stones', type=int, default=None, help="Stones per pit (default: the variant's)")
+    p.add_argument('--time-ms', type=float, default=None,
+                   help='Per-move time budget for the AI (iterative deepening instead of fixed depth)')
+    p.add_argument('--endgame', default=None,
+                   help='Endgame database built with python -m mancala.endgame')
+    p.add_argument('--book', default=None,
+                   help='Opening book built with python -m mancala.book')
+    p.add_argument('--ponder', action='store_true',
+                   help="Let the AI think about your replies while it is your turn")
     args = p.parse_args()
     if args.gui:
-        run_gui(args.stones, args.depth)
+        run_gui(args.stones, args.depth, args.time_ms, args.endgame, args.book, args.ponder, args.variant)
     else:
-        run_cli(args.stones, args.depth)
+        run_cli(args.stones, args.depth, args.time_ms, args.endgame, args.book, args.ponder, args.variant)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,179 @@
+"""Monte Carlo Tree Search agent (UCT) with the same choose() contract as AI.
+
+Each iteration walks the tree by UCB1 from the root, expands one untried
+move, plays `batch` rollouts from the new node and backs the results up.
+A node's statistics are kept for the player who moved into it, so extra
+turns (the same side moving twice) need no special casing. The tree below
+the position reached is kept between moves and reused on the next choose().
+"""
+import math
+import random
+import time
+from typing import Callable, List, Optional, Union
+
+from .board import Board
+from .packed import PackedBoard
+from .rules import PLAYER_A, PLAYER_B, RULES, other
+from .ai import SearchResult
+
+# A rollout policy picks a move for a position from its legal moves.
+Policy = Callable[[PackedBoard, List[int], random.Random], int]
+
+# How many plies below the previous root to look for the new position.
+REUSE_PLIES = 4
+
+# Below this many rollouts per leaf, numpy's per-call overhead outweighs vectorising.
+NUMPY_MIN_BATCH = 16
+
+def random_policy(state: PackedBoard, moves: List[int], rnd: random.Random) -> int:
+    return rnd.choice(moves)
+
+def greedy_policy(state: PackedBoard, moves: List[int], rnd: random.Random) -> int:
+    """Prefer a move that ends in the mover's store, else a random one."""
+    pits = state.pits
+    cur = state.current
+    rt = state.variant.rules
+    store, landing, n = rt.stores[cur], rt.landing[cur], rt.cycle_len
+    for m in moves:
+        if landing[m][pits[m] % n] == store:
+            return m
+    return rnd.choice(moves)
+
+POLICIES = {"random": random_policy, "greedy": greedy_policy}
+
+class Node:
+    __slots__ = ("parent", "move", "mover", "children", "untried", "visits", "wins")
+
+    def __init__(self, parent: Optional["Node"], move: Optional[int], mover: int, state: PackedBoard):
+        self.parent = parent
+        self.move = move
+        self.mover = mover              # player who made `move`; wins are counted for them
+        self.children: List[Node] = []
+        self.untried = state.legal_moves()
+        self.visits = 0
+        self.wins = 0.0                 # 1 per win, 0.5 per draw
+
+class MCTS:
+    def __init__(self, time_ms: Optional[float] = None, iterations: int = 2000, c: float = 1.4,
+                 rollout: Union[str, Policy] = "random", batch: int = 1, seed: Optional[int] = None):
+        self.time_ms = time_ms
+        self.iterations = iterations
+        self.c = c
+        self.policy = POLICIES[rollout] if isinstance(rollout, str) else rollout
+        # Rollouts per expanded leaf; large random batches run on batch.BatchBoard when numpy is available.
+        self.batch = batch
+        self.rnd = random.Random(seed)
+        self._np_rng = None
+        self.root: Optional[Node] = None
+        self.root_state: Optional[PackedBoard] = None
+        # Shared flag (anything with .value) that stops the search early, as for AI.
+        self.stop = None
+
+    def new_game(self) -> None:
+        self.root = self.root_state = None
+
+    def close(self) -> None:
+        pass
+
+    def _reuse(self, state: PackedBoard) -> Optional[Node]:
+        """Subtree of the previous search whose position is `state`, if one is close by."""
+        if self.root is None:
+            return None
+        frontier = [(self.root, self.root_state)]
+        for _ in range(REUSE_PLIES + 1):
+            nxt = []
+            for node, s in frontier:
+                if s == state:
+                    node.parent = None
+                    return node
+                for ch in node.children:
+                    cs = s.clone()
+                    cs.apply_move(ch.move)
+                    nxt.append((ch, cs))
+            frontier = nxt
+        return None
+
+    def _rollouts(self, state: PackedBoard) -> float:
+        """Play self.batch games out from state; returns player A's total score (wins + draws/2)."""
+        if state.terminal():
+            d = state.score(PLAYER_A) - state.score(PLAYER_B)
+            return self.batch * (1.0 if d > 0 else 0.5 if d == 0 else 0.0)
+        # BatchBoard plays the standard rules only.
+        if (self.batch >= NUMPY_MIN_BATCH and self.policy is random_policy
+                and state.variant.rules is RULES):
+            try:
+                import numpy as np
+                from .batch import BatchBoard
+            except ImportError:
+                pass
+            else:
+                if self._np_rng is None:
+                    self._np_rng = np.random.default_rng(self.rnd.getrandbits(32))
+                bb = BatchBoard(np.tile(np.frombuffer(bytes(state.pits), dtype=np.uint8), (self.batch, 1)),
+                                np.full(self.batch, state.current))
+                d = bb.rollout(self._np_rng)
+                return float((d > 0).sum() + 0.5 * (d == 0).sum())
+        total = 0.0
+        for _ in range(self.batch):
+            s = state.clone()
+            while not s.terminal():
+                s.apply_move(self.policy(s, s.legal_moves(), self.rnd))
+            d = s.score(PLAYER_A) - s.score(PLAYER_B)
+            total += 1.0 if d > 0 else 0.5 if d == 0 else 0.0
+        return total
+
+    def _select(self, node: Node) -> Node:
+        log_n = math.log(node.visits)
+        c = self.c
+        return max(node.children, key=lambda ch: ch.wins / ch.visits + c * math.sqrt(log_n / ch.visits))
+
+    def choose(self, b: Board, time_ms: Optional[float] = None) -> SearchResult:
+        moves = b.legal_moves()
+        if not moves:
+            return SearchResult(0.5, None, 0)
+        state = PackedBoard.from_board(b)
+        root = self._reuse(state) or Node(None, None, other(b.current), state)
+        self.root, self.root_state = root, state
+        if len(moves) == 1:
+            return SearchResult(0.5, moves[0], 0)
+
+        if time_ms is None:
+            time_ms = self.time_ms
+        deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000.0
+        playouts = 0
+        max_depth = 0
+        it = 0
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline and root.visits:
+                    break
+            elif it >= self.iterations:
+                break
+            if self.stop is not None and self.stop.value and root.visits:
+                break
+            it += 1
+
+            node, s, depth = root, state.clone(), 0
+            while not node.untried and node.children:
+                node = self._select(node)
+                s.apply_move(node.move)
+                depth += 1
+            if node.untried:
+                m = node.untried.pop(self.rnd.randrange(len(node.untried)))
+                mover = s.current
+                s.apply_move(m)
+                child = Node(node, m, mover, s)
+                node.children.append(child)
+                node = child
+                depth += 1
+            max_depth = max(max_depth, depth)
+
+            score_a = self._rollouts(s)
+            playouts += self.batch
+            while node is not None:
+                node.visits += self.batch
+                node.wins += score_a if node.mover == PLAYER_A else self.batch - score_a
+                node = node.parent
+
+        best = max(root.children, key=lambda ch: ch.visits)
+        return SearchResult(best.wins / best.visits, best.move, playouts, max_depth)
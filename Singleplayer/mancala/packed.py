@@ -0,0 +1,103 @@
+from array import array
+from typing import List, Optional, Union
+from .rules import PLAYER_A, Variant, KALAH, OCC_SHIFTS, OCC_TOTAL_MASK
+from .board import Board, Undo, play, unplay
+from .tt import Zobrist, zobrist_for
+
+# Each pit is stored in one byte, so a pit may hold at most 255 stones; games
+# with more stones than that in total store their pits as 16-bit words.
+PIT_BITS = 8
+MAX_BYTE_STONES = (1 << PIT_BITS) - 1
+
+def pit_array(pits) -> Union[bytearray, array]:
+    """The pits as a bytearray, or an array('H') if the stones could overflow a byte."""
+    if sum(pits) <= MAX_BYTE_STONES:
+        return bytearray(pits)
+    return array('H', pits)
+
+class PackedBoard:
+    """Search-only position: a bytearray of pits (see pit_array) plus side to move,
+    Zobrist key, occupancy (rules.OCC_A_TOTAL) and variant.
+
+    Cheaper to copy than Board and converts losslessly to and from it. Moves are
+    applied with the same board.play() rules as Board.apply_move.
+    """
+    __slots__ = ("pits", "current", "key", "zob", "variant", "occ")
+
+    def __init__(self, pits: Union[bytearray, array], current: int = PLAYER_A, key: Optional[int] = None,
+                 zob: Optional[Zobrist] = None, variant: Variant = KALAH, occ: Optional[int] = None):
+        self.pits = pits
+        self.current = current
+        self.variant = variant
+        self.zob = zobrist_for(sum(pits), len(pits)) if zob is None else zob
+        self.key = self.zob.hash(self) if key is None else key
+        self.occ = variant.rules.occupancy(pits) if occ is None else occ
+
+    @staticmethod
+    def from_board(b: Board) -> "PackedBoard":
+        return PackedBoard(pit_array(b.pits), b.current, b.key, b.zob, b.variant, b.occ)
+
+    def to_board(self) -> Board:
+        return Board(list(self.pits), self.current, self.variant)
+
+    def clone(self) -> "PackedBoard":
+        return PackedBoard(self.pits[:], self.current, self.key, self.zob, self.variant, self.occ)
+
+    def legal_moves(self) -> List[int]:
+        rt = self.variant.rules
+        cur = self.current
+        return list(rt.side_moves[cur][self.occ >> rt.side_shift[cur] & rt.side_full])
+
+    def side_empty(self, player: int) -> bool:
+        return not self.occ & self.variant.rules.side_bits[player]
+
+    def side_total(self, player: int) -> int:
+        return self.occ >> OCC_SHIFTS[player] & OCC_TOTAL_MASK
+
+    def apply_move(self, pit_index: int, undo: bool = False):
+        player = self.current
+        rt = self.variant.rules
+        extra_turn, end_reason, self.key, self.occ, record = play(self.pits, player, pit_index, self.key,
+                                                                  self.zob, rt, self.occ)
+        if not extra_turn and end_reason is None:
+            self.current = rt.other[player]
+        if undo:
+            return extra_turn, end_reason, record
+        return extra_turn, end_reason
+
+    def unmake(self, record: Undo) -> None:
+        unplay(self.pits, record, self.variant.rules)
+        self.current = record.player
+        self.key = record.key
+        self.occ = record.occ
+
+    def score(self, player: int) -> int:
+        return self.pits[self.variant.rules.stores[player]]
+
+    def terminal(self) -> bool:
+        return not self.occ
+
+    def pack(self) -> int:
+        """Exact position as one int: 8 bits per pit, side to move in the top bit.
+
+        ValueError if a pit holds more than 255 stones.
+        """
+        pits = self.pits if isinstance(self.pits, bytearray) else bytes(self.pits.tolist())
+        return int.from_bytes(pits, "little") | (self.current << (PIT_BITS * len(self.pits)))
+
+    @staticmethod
+    def unpack(n: int, variant: Variant = KALAH) -> "PackedBoard":
+        total = variant.total_pits
+        mask = (1 << (PIT_BITS * total)) - 1
+        return PackedBoard(bytearray((n & mask).to_bytes(total, "little")),
+                           n >> (PIT_BITS * total), variant=variant)
+
+    def __eq__(self, other_: object) -> bool:
+        return (isinstance(other_, PackedBoard) and self.pits == other_.pits
+                and self.current == other_.current)
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def __repr__(self) -> str:
+        return f"PackedBoard({list(self.pits)}, current={self.current})"
@@ -0,0 +1,166 @@
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import List, Optional, Tuple
+
+from .board import Board
+from .rules import Variant, KALAH
+from .tt import SharedTranspositionTable
+
+# Per-worker state, set up once by _init_worker in each pool process.
+_AI = None
+_ALPHA = None
+
+def _init_worker(use_tt: bool, tt_mb: float, alpha, endgame=None) -> None:
+    global _AI, _ALPHA
+    from .ai import AI
+    _AI = AI(use_tt=use_tt, tt_mb=tt_mb, endgame=endgame)
+    _ALPHA = alpha
+
+def _search_root_move(pits: List[int], current: int, move: int, depth: int,
+                      deadline: Optional[float], generation: int = 0,
+                      variant: Variant = KALAH) -> Tuple[int, float, bool, int]:
+    """Search one root move with the shared alpha; returns (move, value, exact, nodes).
+
+    The deadline is absolute on the time.perf_counter clock, which is shared
+    between processes, so moves that waited in the queue get no extra time.
+    """
+    from .ai import SearchTimeout
+    if deadline is not None and time.perf_counter() >= deadline:
+        raise SearchTimeout(0)
+    _AI.tt.generation = generation
+    a = _ALPHA.value
+    v, _, nodes = _AI.minimax(Board(pits, current, variant), depth, a, math.inf, current,
+                              deadline=deadline, moves=[move])
+    # At or below the alpha we were given, v is only an upper bound.
+    exact = v > a
+    if exact:
+        with _ALPHA.get_lock():
+            if v > _ALPHA.value:
+                _ALPHA.value = v
+    return move, v, exact, nodes
+
+def _init_smp_worker(tt_name: str, stop, endgame=None) -> None:
+    global _AI
+    from .ai import AI
+    _AI = AI(tt_mb=0, endgame=endgame)
+    _AI.tt = SharedTranspositionTable(name=tt_name)
+    _AI.stop = stop
+
+def _smp_search(pits: List[int], current: int, depth: int, time_ms: Optional[float], offset: int,
+                generation: int = 0, variant: Variant = KALAH):
+    """One Lazy SMP thread: the full search from the root, offset deeper for diversity."""
+    from .ai import SearchResult
+    b = Board(pits, current, variant)
+    _AI.tt.generation = generation
+    _AI.reset_ordering()
+    if time_ms is not None:
+        return _AI.iterative_deepening(b, time_ms, start_depth=1 + offset)
+    val, move, nodes = _AI.minimax(b, depth + offset, -math.inf, math.inf, current)
+    return SearchResult(val, move, nodes, depth + offset)
+
+class RootSplitter:
+    """Spreads the root moves of a search over a pool of worker processes.
+
+    The first (best-ordered) move is searched alone to establish alpha, then
+    the remaining moves run in parallel (Young Brothers Wait at the root).
+    Workers share the root alpha through a multiprocessing.Value so later
+    moves are searched with the best bound found so far. Each worker keeps
+    its own AI and transposition table between searches.
+    """
+    def __init__(self, workers: int, use_tt: bool = True, tt_mb: float = 16, endgame=None):
+        self.workers = workers
+        self.alpha = multiprocessing.Value('d', -math.inf)
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                        initargs=(use_tt, tt_mb, self.alpha, endgame))
+
+    def search(self, b: Board, moves: List[int], depth: int, deadline: Optional[float] = None,
+               generation: int = 0) -> Tuple[float, Optional[int], int]:
+        """Return (value, best move, nodes) like AI.minimax; raises SearchTimeout past the deadline.
+
+        generation is the caller's TT generation, so the workers' tables age with it.
+        """
+        from .ai import SearchTimeout
+        self.alpha.value = -math.inf
+        pits, cur = list(b.pits), b.current
+
+        def submit(m):
+            return self.pool.submit(_search_root_move, pits, cur, m, depth, deadline, generation,
+                                    b.variant)
+
+        order = {m: i for i, m in enumerate(moves)}
+        futures = [submit(moves[0])]
+        wait(futures)
+        if futures[0].exception() is None:
+            futures += [submit(m) for m in moves[1:]]
+        wait(futures)
+
+        nodes, best, timed_out = 0, None, False
+        for f in futures:
+            err = f.exception()
+            if isinstance(err, SearchTimeout):
+                nodes += err.nodes
+                timed_out = True
+                continue
+            if err is not None:
+                raise err
+            m, v, exact, n = f.result()
+            nodes += n
+            if exact and (best is None or v > best[0] or (v == best[0] and order[m] < order[best[1]])):
+                best = (v, m)
+        if timed_out:
+            raise SearchTimeout(nodes)
+        return best[0], best[1], nodes
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+class LazySMP:
+    """Runs the same search in every worker over one shared transposition table.
+
+    Odd-numbered helpers search one ply deeper so the workers diverge and fill
+    the table with different parts of the tree. At fixed depth the result of
+    worker 0 is returned as soon as it finishes and the helpers are stopped;
+    with a time budget the deepest completed iteration wins.
+    """
+    def __init__(self, workers: int, tt_mb: float = 16, endgame=None):
+        self.workers = workers
+        self.tt = SharedTranspositionTable(tt_mb)
+        self.stop = multiprocessing.Value('b', 0, lock=False)
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_smp_worker,
+                                        initargs=(self.tt.name, self.stop, endgame))
+
+    def search(self, b: Board, depth: int, time_ms: Optional[float] = None):
+        from .ai import SearchTimeout
+        self.stop.value = 0
+        self.tt.new_search()
+        pits, cur = list(b.pits), b.current
+        futures = [self.pool.submit(_smp_search, pits, cur, depth, time_ms, i % 2, self.tt.generation,
+                                    b.variant)
+                   for i in range(self.workers)]
+        if time_ms is None:
+            futures[0].result()
+            self.stop.value = 1
+        wait(futures)
+
+        nodes, best = 0, None
+        for f in futures:
+            err = f.exception()
+            if isinstance(err, SearchTimeout):
+                nodes += err.nodes
+                continue
+            if err is not None:
+                raise err
+            r = f.result()
+            nodes += r.nodes
+            if time_ms is None:
+                best = best or r
+            elif best is None or r.depth > best.depth:
+                best = r
+        best.nodes = nodes
+        return best
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+        self.tt.close()
@@ -1,3 +1,7 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
+
 PITS_PER_SIDE = 6
 TOTAL_PITS = 2 * PITS_PER_SIDE + 2  # 14
 A_STORE = PITS_PER_SIDE             # 6
@@ -23,3 +27,184 @@ def opposite(i: int) -> int:
     if is_store(i):
         raise ValueError("Stores have no opposite pit")
     return TOTAL_PITS - 2 - i
+
+# Captures: Kalah takes the opposite pit when the last stone lands in an empty
+# pit of your own; Oware takes opponent pits brought to 2 or 3 stones.
+CAPTURE_KALAH, CAPTURE_OWARE = "kalah", "oware"
+# End of game: each player collects their own side, or the player whose side
+# ran empty collects every stone left.
+SWEEP_OWN, SWEEP_EMPTIED = "own", "emptied"
+
+# Boards keep an occupancy int per position: bit i is set when pit i (not a
+# store) holds stones, and each side's stone total sits above the bits at
+# these shifts. Nothing is on the pits exactly when it is 0.
+OCC_A_TOTAL, OCC_B_TOTAL = 32, 64
+OCC_SHIFTS = (OCC_A_TOTAL, OCC_B_TOTAL)
+OCC_TOTAL_MASK = (1 << 32) - 1
+# Legal moves are looked up per side by occupancy bits, 2**pits_per_side entries.
+MAX_PITS_PER_SIDE = 12
+
+class RuleTables:
+    """Index tables for one rule set, precomputed so hot paths index tuples
+    instead of calling the helpers above. Get shared instances from
+    rules_for() or Variant.rules; RULES is standard Kalah."""
+    __slots__ = ("pits_per_side", "total_pits", "stores", "opp_stores", "other", "sides",
+                 "side_slices", "own_pit", "opposite", "sow_cycle", "sow_pos", "cycle_len",
+                 "landing", "near_store", "kalah_capture", "empty_capture", "oware_capture",
+                 "sweep_own", "bit", "side_bits", "side_shift", "side_full", "side_moves",
+                 "total_unit", "lap_gain", "sow_bits", "sow_gain")
+
+    def __init__(self, pits_per_side: int = PITS_PER_SIDE, capture: str = CAPTURE_KALAH,
+                 empty_capture: bool = False, sweep: str = SWEEP_OWN):
+        if capture not in (CAPTURE_KALAH, CAPTURE_OWARE):
+            raise ValueError(f"Unknown capture rule: {capture!r}")
+        if sweep not in (SWEEP_OWN, SWEEP_EMPTIED):
+            raise ValueError(f"Unknown sweep rule: {sweep!r}")
+        if not 1 <= pits_per_side <= MAX_PITS_PER_SIDE:
+            raise ValueError(f"Pits per side must be 1 to {MAX_PITS_PER_SIDE}")
+        self.kalah_capture = capture == CAPTURE_KALAH
+        self.oware_capture = capture == CAPTURE_OWARE
+        self.empty_capture = empty_capture and self.kalah_capture
+        self.sweep_own = sweep == SWEEP_OWN
+        p = pits_per_side
+        total = 2 * p + 2
+        a_store, b_store = p, total - 1
+        self.pits_per_side = p
+        self.total_pits = total
+        self.stores = (a_store, b_store)
+        self.opp_stores = (b_store, a_store)
+        self.other = (PLAYER_B, PLAYER_A)
+        self.sides = (tuple(range(0, p)), tuple(range(p + 1, 2 * p + 1)))
+        self.side_slices = (slice(0, p), slice(p + 1, 2 * p + 1))
+        self.own_pit = tuple(tuple(i in side for i in range(total)) for side in self.sides)
+        # Opposite pit of every playing pit; -1 for the stores.
+        self.opposite = tuple(-1 if i in self.stores else total - 2 - i for i in range(total))
+        # Pits a player sows into, in order (every pit except the opponent's
+        # store), and each pit's position in that order (-1 for the skipped store).
+        self.sow_cycle = tuple(tuple(i for i in range(total) if i != self.opp_stores[pl])
+                               for pl in (PLAYER_A, PLAYER_B))
+        self.sow_pos = tuple(tuple(c.index(i) if i in c else -1 for i in range(total))
+                             for c in self.sow_cycle)
+        n = self.cycle_len = total - 1
+        # landing[player][pit][stones % cycle_len]: where the last stone sown from pit lands.
+        self.landing = tuple(
+            tuple(tuple(c[(pos[i] + r) % n] for r in range(n)) if pos[i] >= 0 else ()
+                  for i in range(total))
+            for c, pos in zip(self.sow_cycle, self.sow_pos))
+        # Own pits at most 3 pits before the player's store (used by evaluation).
+        self.near_store = tuple(tuple(i for i in side if (store - i) % total <= 3)
+                                for side, store in zip(self.sides, self.stores))
+
+        # Occupancy tables (see OCC_A_TOTAL).
+        self.bit = tuple(0 if i in self.stores else 1 << i for i in range(total))
+        self.side_bits = tuple(sum(self.bit[i] for i in side) for side in self.sides)
+        self.side_shift = (0, p + 1)
+        self.side_full = (1 << p) - 1
+        # side_moves[player][side bits >> side_shift]: the player's non-empty pits.
+        self.side_moves = tuple(tuple(tuple(side[j] for j in range(p) if m >> j & 1)
+                                      for m in range(1 << p))
+                                for side in self.sides)
+        # One stone on a side, as an occupancy increment.
+        self.total_unit = (1 << OCC_A_TOTAL, 1 << OCC_B_TOTAL)
+        # A full lap puts one stone in every pit of both sides.
+        self.lap_gain = p * (self.total_unit[0] + self.total_unit[1])
+        # sow_bits/sow_gain[player][pit][rem]: occupancy bits of, and stones
+        # added to each side by, the last rem stones sown from pit.
+        unit = tuple(self.total_unit[0] if self.own_pit[0][i] else
+                     self.total_unit[1] if self.own_pit[1][i] else 0 for i in range(total))
+        self.sow_bits = tuple(
+            tuple(tuple(sum(self.bit[c[(pos[i] + k) % n]] for k in range(1, r + 1)) for r in range(n))
+                  if pos[i] >= 0 else () for i in range(total))
+            for c, pos in zip(self.sow_cycle, self.sow_pos))
+        self.sow_gain = tuple(
+            tuple(tuple(sum(unit[c[(pos[i] + k) % n]] for k in range(1, r + 1)) for r in range(n))
+                  if pos[i] >= 0 else () for i in range(total))
+            for c, pos in zip(self.sow_cycle, self.sow_pos))
+
+    def occupancy(self, pits) -> int:
+        """Occupancy of pits computed from scratch; boards keep theirs up to date in play()."""
+        occ = 0
+        for player, side in enumerate(self.sides):
+            occ += sum(pits[i] for i in side) * self.total_unit[player]
+            occ |= sum(self.bit[i] for i in side if pits[i])
+        return occ
+
+def rules_for(pits_per_side: int = PITS_PER_SIDE, capture: str = CAPTURE_KALAH,
+              empty_capture: bool = False, sweep: str = SWEEP_OWN) -> RuleTables:
+    """The shared tables for a rule set."""
+    return _rules(pits_per_side, capture, bool(empty_capture) and capture == CAPTURE_KALAH, sweep)
+
+@lru_cache(maxsize=None)
+def _rules(pits_per_side: int, capture: str, empty_capture: bool, sweep: str) -> RuleTables:
+    return RuleTables(pits_per_side, capture, empty_capture, sweep)
+
+RULES = rules_for()
+
+@dataclass(frozen=True)
+class Variant:
+    """A rule set: board size, starting stones per pit and the optional rules.
+
+    Written as a spec string like "6x4" or "4x3,empty-capture,sweep-emptied"
+    (options: empty-capture, oware, sweep-emptied); parse() reads it back.
+    """
+    pits_per_side: int = PITS_PER_SIDE
+    seeds: int = 4
+    empty_capture: bool = False     # a Kalah capture also happens when the opposite pit is empty
+    capture: str = CAPTURE_KALAH
+    sweep: str = SWEEP_OWN
+    rules: RuleTables = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.empty_capture and self.capture != CAPTURE_KALAH:
+            raise ValueError("empty-capture only applies to Kalah captures")
+        object.__setattr__(self, "rules", rules_for(self.pits_per_side, self.capture,
+                                                    self.empty_capture, self.sweep))
+
+    @property
+    def total_pits(self) -> int:
+        return self.rules.total_pits
+
+    @property
+    def stones(self) -> int:
+        """Stones in a game started with `seeds` per pit."""
+        return 2 * self.pits_per_side * self.seeds
+
+    def start_pits(self, seeds: Optional[int] = None) -> List[int]:
+        s = self.seeds if seeds is None else seeds
+        p = self.pits_per_side
+        return [s] * p + [0] + [s] * p + [0]
+
+    def __str__(self) -> str:
+        opts = [f"{self.pits_per_side}x{self.seeds}"]
+        if self.empty_capture:
+            opts.append("empty-capture")
+        if self.capture == CAPTURE_OWARE:
+            opts.append("oware")
+        if self.sweep == SWEEP_EMPTIED:
+            opts.append("sweep-emptied")
+        return ",".join(opts)
+
+    def __reduce__(self):
+        return Variant.parse, (str(self),)
+
+    @staticmethod
+    def parse(spec: str) -> "Variant":
+        size, *opts = spec.strip().lower().split(",")
+        try:
+            pits, seeds = (int(x) for x in size.split("x"))
+        except ValueError:
+            raise ValueError(f"Bad variant {spec!r}: expected PITSxSEEDS like 6x4") from None
+        kw = {}
+        for o in opts:
+            if o == "empty-capture":
+                kw["empty_capture"] = True
+            elif o == "oware":
+                kw["capture"] = CAPTURE_OWARE
+            elif o == "sweep-emptied":
+                kw["sweep"] = SWEEP_EMPTIED
+            else:
+                raise ValueError(f"Bad variant {spec!r}: unknown option {o!r}")
+        return Variant(pits, seeds, **kw)
+
+# Kalah(6,4), the standard game.
+KALAH = Variant()
@@ -0,0 +1,151 @@
+"""Headless AI-vs-AI games for strength and throughput regression checks.
+
+Agents are given as strings:
+
+    ai:6        AI searching to depth 6
+    ai:250ms    AI with a 250 ms per-move time budget
+    mcts:2000   MCTS agent with 2000 iterations per move
+    mcts:250ms  MCTS agent with a 250 ms per-move time budget
+    greedy      AI.greedy_hint (one-move evaluation lookahead)
+    random      uniformly random legal move
+
+    python -m mancala.selfplay --games 200 --a ai:6 --b greedy --workers 4 --out games.jsonl
+    python -m mancala.selfplay --variant 4x3,empty-capture --a ai:8 --b mcts:2000
+
+Each finished game is written as one JSON line with its moves, final scores,
+winner, and per-side nodes and thinking time.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple
+
+from .ai import AI
+from .board import Board
+from .mcts import MCTS
+from .rules import PLAYER_A, PLAYER_B, Variant, KALAH
+
+Agent = Callable[[Board], Tuple[int, int]]  # board -> (move, nodes searched)
+
+def make_agent(spec: str, rnd: random.Random) -> Agent:
+    if spec == "random":
+        return lambda b: (rnd.choice(b.legal_moves()), 0)
+    if spec == "greedy":
+        ai = AI(use_tt=False, tt_mb=0)
+        return lambda b: (ai.greedy_hint(b), 0)
+    if spec.startswith(("ai:", "mcts:")):
+        kind, arg = spec.split(":", 1)
+        if kind == "ai":
+            ai = AI(time_ms=float(arg[:-2])) if arg.endswith("ms") else AI(depth=int(arg))
+        else:
+            seed = rnd.getrandbits(32)
+            ai = MCTS(time_ms=float(arg[:-2]), seed=seed) if arg.endswith("ms") else MCTS(iterations=int(arg), seed=seed)
+
+        def choose(b: Board) -> Tuple[int, int]:
+            res = ai.choose(b)
+            return res.move, res.nodes
+        return choose
+    raise ValueError(f"Unknown agent {spec!r} (use ai:<depth>, ai:<ms>ms, mcts:<iterations>, mcts:<ms>ms, greedy or random)")
+
+def play_game(game: int, a: str, b: str, stones: Optional[int] = None, seed: int = 0, random_plies: int = 0,
+              variant: Variant = KALAH) -> dict:
+    """Play one game, agent `a` as player A and `b` as player B; stones defaults to variant.seeds."""
+    rnd = random.Random(seed * 1_000_003 + game)
+    agents = {PLAYER_A: make_agent(a, rnd), PLAYER_B: make_agent(b, rnd)}
+    nodes = {PLAYER_A: 0, PLAYER_B: 0}
+    spent = {PLAYER_A: 0.0, PLAYER_B: 0.0}
+    board = Board.new(stones, variant)
+    stones = variant.seeds if stones is None else stones
+    moves = []
+    while not board.terminal() and board.legal_moves():
+        player = board.current
+        if len(moves) < random_plies:
+            mv, n = rnd.choice(board.legal_moves()), 0
+        else:
+            t0 = time.perf_counter()
+            mv, n = agents[player](board)
+            spent[player] += time.perf_counter() - t0
+        nodes[player] += n
+        moves.append(mv)
+        board.apply_move(mv)
+    sa, sb = board.score(PLAYER_A), board.score(PLAYER_B)
+    return {
+        "game": game, "a": a, "b": b, "variant": str(variant), "stones": stones,
+        "moves": moves, "score": [sa, sb],
+        "winner": "A" if sa > sb else "B" if sb > sa else "draw",
+        "nodes": [nodes[PLAYER_A], nodes[PLAYER_B]],
+        "time": [round(spent[PLAYER_A], 6), round(spent[PLAYER_B], 6)],
+    }
+
+def _game_args(i: int, a: str, b: str, swap: bool) -> Tuple[str, str]:
+    return (b, a) if swap and i % 2 else (a, b)
+
+def run(games: int, a: str, b: str, stones: Optional[int] = None, workers: int = 1, seed: int = 0,
+        random_plies: int = 0, swap: bool = True, out=None, on_result: Optional[Callable[[dict], None]] = None,
+        variant: Variant = KALAH) -> dict:
+    """Play `games` games and stream each result as a JSON line to `out`; returns a summary.
+
+    With swap=True odd-numbered games exchange sides, so each agent plays both A and B.
+    """
+    summary = {"wins": [0, 0], "draws": 0, "games": 0, "nodes": 0}
+    t0 = time.perf_counter()
+
+    def record(r: dict) -> None:
+        if r["winner"] == "draw":
+            summary["draws"] += 1
+        else:
+            # index of the winning agent: 0 for `a`, 1 for `b`
+            swapped = swap and r["game"] % 2
+            summary["wins"][(r["winner"] == "B") != bool(swapped)] += 1
+        summary["games"] += 1
+        summary["nodes"] += sum(r["nodes"])
+        if out is not None:
+            out.write(json.dumps(r) + "\n")
+            out.flush()
+        if on_result is not None:
+            on_result(r)
+
+    if workers <= 1:
+        for i in range(games):
+            record(play_game(i, *_game_args(i, a, b, swap), stones, seed, random_plies, variant))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(play_game, i, *_game_args(i, a, b, swap), stones, seed, random_plies,
+                                   variant) for i in range(games)]
+            for f in as_completed(futures):
+                record(f.result())
+    summary["seconds"] = time.perf_counter() - t0
+    return summary
+
+def main():
+    p = argparse.ArgumentParser(description="Play AI-vs-AI games headlessly.")
+    p.add_argument('--games', type=int, default=100)
+    p.add_argument('--a', default='ai:4', help='Agent for player A (ai:<depth>, ai:<ms>ms, mcts:<iterations>, mcts:<ms>ms, greedy, random)')
+    p.add_argument('--b', default='greedy', help='Agent for player B')
+    p.add_argument('--variant', type=Variant.parse, default=KALAH,
+                   help='Rules as PITSxSEEDS[,empty-capture][,oware][,sweep-emptied] (default 6x4)')
+    p.add_argument('--stones', type=int, default=None, help="Stones per pit (default: the variant's)")
+    p.add_argument('--workers', type=int, default=1)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--random-plies', type=int, default=0,
+                   help='Open each game with this many random moves for variety')
+    p.add_argument('--no-swap', action='store_true', help='Keep agents on the same side every game')
+    p.add_argument('--out', default='-', help='JSONL output path (- for stdout)')
+    args = p.parse_args()
+
+    out = sys.stdout if args.out == '-' else open(args.out, 'w')
+    try:
+        s = run(args.games, args.a, args.b, args.stones, args.workers, args.seed,
+                args.random_plies, not args.no_swap, out, variant=args.variant)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{s['games']} games in {s['seconds']:.2f}s ({s['games'] / max(s['seconds'], 1e-9):.1f} games/s, "
+          f"{s['nodes']} nodes): {args.a}={s['wins'][0]} {args.b}={s['wins'][1]} draws={s['draws']}",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,207 @@
 import random
+import struct
+from array import array
+from functools import lru_cache
+from typing import Optional, Tuple
 from .rules import TOTAL_PITS, PLAYER_B
 
+# Stone counts 0..BASE_STONES are drawn from the seed's main stream, as in the
+# original 14x49 table, so keys (and saved opening books) for the standard
+# game are unchanged; larger counts come from a stream per pit.
+BASE_STONES = 48
+# Most stones in the standard game, 6 pits x 4 stones x 2 sides.
+MAX_HASHED_STONES = 48
+
+# Bound types stored with each entry.
+EXACT, UPPER, LOWER = 0, -1, 1
+
 class Zobrist:
-    def __init__(self, seed: int = 12345):
-        random.seed(seed)
-        self.table = [[random.getrandbits(64) for _ in range(49)] for _ in range(TOTAL_PITS)]
-        self.turn_key = random.getrandbits(64)
+    """Immutable Zobrist keys for boards of `pits` pits holding up to `max_stones` stones each.
+
+    Uses a private RNG, so building one leaves the global random module alone.
+    Every table built from the same seed and pit count agrees on the keys it
+    has, so a position hashes the same under any table large enough for it.
+    Get shared instances from zobrist_for() instead of building new ones.
+    """
+    __slots__ = ("pits", "max_stones", "table", "turn_key", "root_key")
+
+    def __init__(self, max_stones: int = MAX_HASHED_STONES, pits: int = TOTAL_PITS, seed: int = 12345):
+        rnd = random.Random(seed)
+        rows = [[rnd.getrandbits(64) for _ in range(BASE_STONES + 1)] for _ in range(pits)]
+        self.turn_key = rnd.getrandbits(64)
+        # Mixed into TT keys when the searching player is B: evaluate() is not
+        # antisymmetric (the near-store term only counts the root player's pits),
+        # so negamax values still depend on which side the search is for.
+        self.root_key = rnd.getrandbits(64)
+        for i, row in enumerate(rows):
+            del row[max_stones + 1:]
+            extra = random.Random(f"{seed}/{i}")
+            row.extend(extra.getrandbits(64) for _ in range(max_stones - BASE_STONES))
+        self.table = tuple(tuple(row) for row in rows)
+        self.pits = pits
+        self.max_stones = max_stones
+
+    def pit_key(self, i: int, stones: int) -> int:
+        return self.table[i][stones]
 
     def hash(self, board) -> int:
+        """Key of anything with pits/current; IndexError if a pit holds more than max_stones."""
         h = 0
-        for i in range(TOTAL_PITS):
-            s = board.pits[i]
-            s = min(s, 48)
-            h ^= self.table[i][s]
+        table = self.table
+        pits = board.pits
+        for i in range(self.pits):
+            h ^= table[i][pits[i]]
         if board.current == PLAYER_B:
             h ^= self.turn_key
         return h
+
+def zobrist_for(max_stones: int, pits: int = TOTAL_PITS) -> Zobrist:
+    """The shared Zobrist table for boards with at most max_stones stones in total."""
+    return _zobrist(max(max_stones, MAX_HASHED_STONES), pits)
+
+@lru_cache(maxsize=None)
+def _zobrist(max_stones: int, pits: int) -> Zobrist:
+    return Zobrist(max_stones, pits)
+
+# Shared keys for the standard game; AI uses its turn and root keys, which every table shares.
+ZOBRIST = zobrist_for(MAX_HASHED_STONES)
+
+class TranspositionTable:
+    """Fixed-size table of two-slot buckets indexed by the low hash bits.
+
+    Slot 0 of a bucket keeps the deepest entry seen, slot 1 always takes the
+    newest one. Entries hold (depth, bound type, value, best move) and the
+    search generation that last stored or hit them: the table is kept across
+    searches, and call new_search() before each so that slot 0 entries left
+    over from earlier searches give way to new ones regardless of depth.
+    """
+    ENTRY_BYTES = 8 + 2 + 1 + 8 + 1 + 1  # key, depth, flag, value, move, generation
+
+    def __init__(self, size_mb: float = 16):
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = buckets - 1
+        slots = 2 * buckets
+        self.keys = array('Q', [0]) * slots
+        self.depths = array('h', [-1]) * slots
+        self.flags = array('b', [0]) * slots
+        self.values = array('d', [0.0]) * slots
+        self.moves = array('b', [-1]) * slots
+        self.gens = array('B', [0]) * slots
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def size_mb(self) -> float:
+        return len(self.keys) * self.ENTRY_BYTES / (1024 * 1024)
+
+    def clear(self) -> None:
+        n = len(self.keys)
+        self.keys = array('Q', [0]) * n
+        self.depths = array('h', [-1]) * n
+        self.flags = array('b', [0]) * n
+        self.values = array('d', [0.0]) * n
+        self.moves = array('b', [-1]) * n
+        self.gens = array('B', [0]) * n
+        self.generation = 0
+
+    def new_search(self) -> None:
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, float, Optional[int]]]:
+        i = (key & self.mask) << 1
+        for j in (i, i + 1):
+            if self.keys[j] == key and self.depths[j] >= 0:
+                self.gens[j] = self.generation
+                m = self.moves[j]
+                return self.depths[j], self.flags[j], self.values[j], (m if m >= 0 else None)
+        return None
+
+    def store(self, key: int, depth: int, flag: int, value: float, move: Optional[int]) -> None:
+        i = (key & self.mask) << 1
+        if not (self.keys[i] == key or depth >= self.depths[i] or self.gens[i] != self.generation):
+            i += 1
+        self.keys[i] = key
+        self.gens[i] = self.generation
+        self.depths[i] = depth
+        self.flags[i] = flag
+        self.values[i] = value
+        self.moves[i] = -1 if move is None else move
+
+class SharedTranspositionTable:
+    """TranspositionTable laid out in multiprocessing.shared_memory for several processes.
+
+    Each slot is three 64-bit words (check, value bits, meta) with check =
+    key ^ value ^ meta, so a slot torn by a concurrent writer fails
+    verification and reads as a miss; no locks are taken. Same two-slot
+    bucket policy, aging and probe/store interface as TranspositionTable; the
+    generation lives in each process's instance, so the owner passes it on.
+    """
+    ENTRY_BYTES = 24
+
+    def __init__(self, size_mb: float = 16, name: Optional[str] = None):
+        from multiprocessing import shared_memory
+        if name is None:
+            buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+            buckets = 1 << (buckets.bit_length() - 1)
+            self.shm = shared_memory.SharedMemory(create=True, size=2 * buckets * self.ENTRY_BYTES)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast('Q')
+        self.mask = len(self.words) // 6 - 1
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.words) // 3
+
+    @property
+    def size_mb(self) -> float:
+        return len(self.words) * 8 / (1024 * 1024)
+
+    def clear(self) -> None:
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+        self.generation = 0
+
+    def new_search(self) -> None:
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, float, Optional[int]]]:
+        w = self.words
+        i = (key & self.mask) * 6
+        for j in (i, i + 3):
+            check, vbits, meta = w[j], w[j + 1], w[j + 2]
+            if meta and check ^ vbits ^ meta == key:
+                return _unpack_entry(vbits, meta)
+        return None
+
+    def store(self, key: int, depth: int, flag: int, value: float, move: Optional[int]) -> None:
+        w = self.words
+        i = (key & self.mask) * 6
+        check, vbits, meta = w[i], w[i + 1], w[i + 2]
+        if (meta and check ^ vbits ^ meta != key and depth < ((meta >> 16) & 0xFFFF) - 1
+                and meta >> 32 == self.generation):
+            i += 3
+        vbits = _Q.unpack(_D.pack(value))[0]
+        meta = ((self.generation << 32) | ((depth + 1) << 16) | ((flag + 1) << 8)
+                | (0 if move is None else move + 1))
+        w[i + 1] = vbits
+        w[i + 2] = meta
+        w[i] = key ^ vbits ^ meta
+
+    def close(self) -> None:
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+_Q = struct.Struct('<Q')
+_D = struct.Struct('<d')
+
+def _unpack_entry(vbits: int, meta: int) -> Tuple[int, int, float, Optional[int]]:
+    m = meta & 0xFF
+    return ((meta >> 16) & 0xFFFF) - 1, ((meta >> 8) & 0xFF) - 1, _D.unpack(_Q.pack(vbits))[0], (m - 1 if m else None)
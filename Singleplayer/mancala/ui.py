@@ -5,22 +5,47 @@ import subprocess
 from .board import Board
 from .history import History
 from .ai import AI
-from .rules import PLAYER_A, PLAYER_B, A_STORE, B_STORE
-
-
-def run_cli(start_stones: int = 4, depth: int = 6):
-    b = Board.new(start_stones)
+from .endgame import EndgameDB
+from .book import OpeningBook
+from .rules import PLAYER_A, PLAYER_B, Variant, KALAH
+
+
+def _start_ponder(ai: AI, b: Board):
+    """Let the AI search the human's replies to b on a background thread."""
+    import threading
+    from types import SimpleNamespace
+    stop = SimpleNamespace(value=0)
+    ai.stop, ai.on_progress = stop, None
+    t = threading.Thread(target=ai.ponder, args=(b.clone(),), daemon=True)
+    t.start()
+    return t, stop
+
+def _stop_ponder(ai: AI, job) -> None:
+    if job is not None:
+        t, stop = job
+        stop.value = 1
+        t.join()
+        ai.stop = None
+
+
+def run_cli(start_stones=None, depth: int = 6, time_ms=None, endgame=None, book=None, ponder=False,
+            variant: Variant = KALAH):
+    b = Board.new(start_stones, variant)
+    a_store, b_store = variant.rules.stores
+    top, bottom = variant.rules.sides[PLAYER_B][::-1], variant.rules.sides[PLAYER_A]
     hist = History()
-    ai = AI(depth=depth)
+    ai = AI(depth=depth, time_ms=time_ms,
+            endgame=EndgameDB.load(endgame) if endgame else None,
+            book=OpeningBook.load(book) if book else None)
 
     def draw():
         pits = b.pits
         print("\n" + "=" * 38)
-        print("          [12][11][10][09][08][07]")
-        print("      B  ", " ".join(f"{pits[i]:2d}" for i in range(12, 6, -1)))
-        print(f"[{pits[B_STORE]:2d}]                          [{pits[A_STORE]:2d}]")
-        print("      A  ", " ".join(f"{pits[i]:2d}" for i in range(0, 6)))
-        print("          [00][01][02][03][04][05]")
+        print("          " + "".join(f"[{i:02d}]" for i in top))
+        print("      B  ", " ".join(f"{pits[i]:2d}" for i in top))
+        print(f"[{pits[b_store]:2d}]" + " " * (4 * len(top) + 2) + f"[{pits[a_store]:2d}]")
+        print("      A  ", " ".join(f"{pits[i]:2d}" for i in bottom))
+        print("          " + "".join(f"[{i:02d}]" for i in bottom))
         print(f"Turn: {'A' if b.current == PLAYER_A else 'B'}")
 
     draw()
@@ -35,12 +60,16 @@ def run_cli(start_stones: int = 4, depth: int = 6):
         if b.current == PLAYER_B:
             res = ai.choose(b)
             mv = res.move
-            print(f"AI chooses {mv} | nodes: {res.nodes}")
+            print(f"AI chooses {mv} | depth: {res.depth} | nodes: {res.nodes}")
         else:
             legal = b.legal_moves()
-            s = input(
-                f"Choose pit from {legal} (u=undo,r=redo,g=hint,q=quit): "
-            ).strip().lower()
+            job = _start_ponder(ai, b) if ponder else None
+            try:
+                s = input(
+                    f"Choose pit from {legal} (u=undo,r=redo,g=hint,q=quit): "
+                ).strip().lower()
+            finally:
+                _stop_ponder(ai, job)
             if s == "q":
                 break
             if s == "u":
@@ -67,13 +96,13 @@ def run_cli(start_stones: int = 4, depth: int = 6):
             if mv not in legal:
                 print("Illegal move.")
                 continue
-        hist.push(b)
-        b.apply_move(mv)
+        hist.apply_move(b, mv)
         draw()
 
 
 
-def run_gui(start_stones: int = 4, depth: int = 6):
+def run_gui(start_stones=None, depth: int = 6, time_ms=None, endgame=None, book=None, ponder=False,
+            variant: Variant = KALAH):
     """
     You are Player A (bottom row).
     The AI is Player B (top row).
@@ -84,17 +113,24 @@ def run_gui(start_stones: int = 4, depth: int = 6):
     import os
     import sys
     import subprocess
+    import threading
+    import time
+    from types import SimpleNamespace
 
-    from .rules import PLAYER_A, PLAYER_B, A_STORE, B_STORE
+    from .rules import PLAYER_A, PLAYER_B
     from .board import Board
     from .history import History
-    from .ai import AI
+    from .ai import AI, SearchTimeout
 
     # --- model ---
-    b = Board.new(start_stones)
+    b = Board.new(start_stones, variant)
     hist = History()
-    ai = AI(depth=depth)
+    ai = AI(depth=depth, time_ms=time_ms,
+            endgame=EndgameDB.load(endgame) if endgame else None,
+            book=OpeningBook.load(book) if book else None)
     game_over = False
+    thinking = None  # running AI search job (see ai_turn), or None
+    pondering = None  # (thread, stop flag) while the AI searches on your time
 
     # --- shared colors (match multiplayer) ---
     bg_color = "#151726"
@@ -123,8 +159,9 @@ def run_gui(start_stones: int = 4, depth: int = 6):
     p_you_label = None
 
     # --- pit indices ---
-    top_indices = [12, 11, 10, 9, 8, 7]   # AI pits (B) left→right
-    bottom_indices = [0, 1, 2, 3, 4, 5]   # Your pits (A) left→right
+    top_indices = list(variant.rules.sides[PLAYER_B][::-1])   # AI pits (B) left→right
+    bottom_indices = list(variant.rules.sides[PLAYER_A])      # Your pits (A) left→right
+    a_store, b_store = variant.rules.stores
 
     # --- UI functions ---
 
@@ -183,8 +220,8 @@ def run_gui(start_stones: int = 4, depth: int = 6):
                 btn.config(state="disabled", relief="sunken", bd=2)
 
         # stores
-        store_ai_label.config(text=str(b.pits[B_STORE]))
-        store_you_label.config(text=str(b.pits[A_STORE]))
+        store_ai_label.config(text=str(b.pits[b_store]))
+        store_you_label.config(text=str(b.pits[a_store]))
 
         # turn highlighting
         if not game_over and b.current == PLAYER_A:
@@ -241,11 +278,137 @@ def run_gui(start_stones: int = 4, depth: int = 6):
     def new_game():
         """Reset board, history, and game_over flag."""
         nonlocal b, hist, game_over
-        b = Board.new(start_stones)
+        cancel_ai()
+        stop_ponder()
+        ai.new_game()
+        b = Board.new(start_stones, variant)
         hist = History()
         game_over = False
         log("New singleplayer game started.")
         refresh_board()
+        start_ponder()
+
+    def start_ponder():
+        """While it is your turn, let the AI search your possible replies."""
+        nonlocal pondering
+        if (not ponder or pondering is not None or thinking is not None
+                or game_over or b.terminal() or b.current != PLAYER_A):
+            return
+        pondering = _start_ponder(ai, b)
+
+    def stop_ponder():
+        nonlocal pondering
+        _stop_ponder(ai, pondering)
+        pondering = None
+
+    def ai_turn():
+        """Start the AI search on a worker thread; poll_ai() picks up the result."""
+        nonlocal thinking
+
+        if thinking is not None:
+            return
+        stop_ponder()
+        if game_over or b.terminal() or b.current != PLAYER_B:
+            refresh_board()
+            return
+
+        job = {
+            "board": b.clone(), "stop": SimpleNamespace(value=0),
+            "result": None, "error": None, "discard": False,
+            "depth": 0, "nodes": 0, "base": 0, "start": time.perf_counter(),
+        }
+
+        def on_progress(depth: int, nodes: int):
+            # nodes restart at every iterative-deepening iteration
+            if depth != job["depth"]:
+                job["base"] += job["nodes"]
+                job["depth"] = depth
+            job["nodes"] = nodes
+
+        def work():
+            try:
+                job["result"] = ai.choose(job["board"])
+            except SearchTimeout:
+                pass  # fixed-depth search stopped before it finished
+            except Exception as e:
+                job["error"] = e
+
+        ai.stop, ai.on_progress = job["stop"], on_progress
+        job["thread"] = threading.Thread(target=work, daemon=True)
+        thinking = job
+        stop_btn.config(state="normal")
+        status_label.config(text="AI is thinking...")
+        job["thread"].start()
+        root.after(100, poll_ai)
+
+    def poll_ai():
+        """Show search progress while the worker runs, then play its move."""
+        nonlocal thinking
+
+        job = thinking
+        if job is None:
+            return
+        if job["thread"].is_alive():
+            elapsed = max(time.perf_counter() - job["start"], 1e-6)
+            nodes = job["base"] + job["nodes"]
+            status_label.config(
+                text=f"AI is thinking... depth {job['depth']}, "
+                     f"{nodes:,} nodes, {nodes / elapsed:,.0f} nodes/s"
+            )
+            root.after(100, poll_ai)
+            return
+
+        thinking = None
+        ai.stop = ai.on_progress = None
+        stop_btn.config(state="disabled")
+        if job["discard"] or game_over or b.current != PLAYER_B:
+            refresh_board()
+            start_ponder()
+            return
+        if job["error"] is not None:
+            log(f"AI error: {job['error']!r}")
+            refresh_board()
+            return
+
+        res = job["result"]
+        if res is None:
+            mv = ai.greedy_hint(b)
+            log("AI search stopped; playing its greedy move.")
+        else:
+            mv = res.move
+        if mv is None:
+            log("AI has no legal moves.")
+            refresh_board()
+            maybe_end_after_move()
+            return
+
+        if res is None:
+            log(f"AI plays pit {mv}.")
+        else:
+            log(f"AI plays pit {mv} (depth {res.depth}, nodes searched: {res.nodes}).")
+        hist.apply_move(b, mv)
+        refresh_board()
+
+        if maybe_end_after_move():
+            return
+
+        # If AI gets another turn, schedule again
+        if b.current == PLAYER_B and not b.terminal():
+            root.after(300, ai_turn)
+        else:
+            start_ponder()
+
+    def stop_ai():
+        """Ask the running search to stop; the AI then plays the best move it has."""
+        if thinking is not None:
+            thinking["stop"].value = 1
+            log("Stopping AI search...")
+
+    def cancel_ai():
+        """Abort the running search and drop its result (undo/redo/new game)."""
+        if thinking is not None:
+            thinking["stop"].value = 1
+            thinking["discard"] = True
 
     def human_move(pit_index: int):
         """Apply a human move, then let the AI respond."""
@@ -263,71 +426,43 @@ def run_gui(start_stones: int = 4, depth: int = 6):
             return
 
         # apply human move
-        hist.push(b)
+        stop_ponder()
         log(f"You play pit {pit_index}.")
-        b.apply_move(pit_index)
+        hist.apply_move(b, pit_index)
         refresh_board()
         if maybe_end_after_move():
             return
-
-        # Now let the AI play (after a short delay)
-        def ai_turn():
-            nonlocal game_over
-
-            if game_over or b.terminal() or b.current != PLAYER_B:
-                refresh_board()
-                return
-
-            status_label.config(text="AI is thinking...")
-            root.update_idletasks()
-
-            try:
-                res = ai.choose(b)
-            except Exception as e:
-                log(f"AI error: {e!r}")
-                refresh_board()
-                return
-
-            mv = res.move
-            if mv is None:
-                log("AI has no legal moves.")
-                refresh_board()
-                if maybe_end_after_move():
-                    return
-                return
-
-            hist.push(b)
-            log(f"AI plays pit {mv} (nodes searched: {res.nodes}).")
-            b.apply_move(mv)
-            refresh_board()
-
-            if maybe_end_after_move():
-                return
-
-            # If AI gets another turn, schedule again
-            if b.current == PLAYER_B and not b.terminal():
-                root.after(300, ai_turn)
+        if b.current == PLAYER_A:
+            start_ponder()  # extra turn: keep thinking about the rest of it
+            return
 
         # start AI after a short delay so user can see their move
         root.after(250, ai_turn)
 
     def do_undo():
         nonlocal game_over
+        cancel_ai()
+        stop_ponder()
         if hist.undo(b):
             log("Undo.")
             game_over = False
             refresh_board()
+            start_ponder()
         else:
             log("Nothing to undo.")
 
     def do_redo():
         nonlocal game_over
+        cancel_ai()
+        stop_ponder()
         if hist.redo(b):
             log("Redo.")
             game_over = False
             refresh_board()
             if b.terminal():
                 finish_game()
+            else:
+                start_ponder()
         else:
             log("Nothing to redo.")
 
@@ -512,7 +647,7 @@ def run_gui(start_stones: int = 4, depth: int = 6):
     )
     store_ai_label.grid(row=0, column=0, rowspan=3, padx=10, pady=5, sticky="ns")
 
-    # AI top pits 12..7 (non-clickable)
+    # AI top pits, e.g. 12..7 (non-clickable)
     for col, idx in enumerate(top_indices):
         pit_button = tk.Button(
             board_frame,
@@ -531,11 +666,11 @@ def run_gui(start_stones: int = 4, depth: int = 6):
         top_pit_buttons.append(pit_button)
 
     # spacers
-    for col in range(6):
+    for col in range(len(top_indices)):
         spacer = tk.Label(board_frame, text=" ", width=5, bg=board_bg)
         spacer.grid(row=1, column=1 + col)
 
-    # bottom pits: player 0..5 (clickable)
+    # bottom pits: player, e.g. 0..5 (clickable)
     for col, idx in enumerate(bottom_indices):
         pit_button = tk.Button(
             board_frame,
@@ -565,7 +700,7 @@ def run_gui(start_stones: int = 4, depth: int = 6):
         padx=5,
         pady=10,
     )
-    store_you_label.grid(row=0, column=7, rowspan=3, padx=10, pady=5, sticky="ns")
+    store_you_label.grid(row=0, column=1 + len(bottom_indices), rowspan=3, padx=10, pady=5, sticky="ns")
 
     p_you_label = tk.Label(
         center_frame,
@@ -646,6 +781,16 @@ def run_gui(start_stones: int = 4, depth: int = 6):
     )
     depth_plus_btn.pack(side="left", padx=4)
 
+    stop_btn = tk.Button(
+        btn_frame,
+        text="Stop AI (s)",
+        font=("Helvetica", 11),
+        padx=6,
+        state="disabled",
+        command=stop_ai,
+    )
+    stop_btn.pack(side="left", padx=4)
+
     # status + log
     status_label = tk.Label(
         root,
@@ -697,11 +842,14 @@ def run_gui(start_stones: int = 4, depth: int = 6):
             do_depth(-1)
         elif key in ("m", "M"):
             go_to_main_menu()
+        elif key in ("s", "S"):
+            stop_ai()
 
     root.bind("<Key>", on_key)
 
     # initial draw
     log("Singleplayer Mancala started. You are the bottom row (Player A).")
     refresh_board()
+    start_ponder()
 
     root.mainloop()
@@ -12,3 +12,166 @@ def test_minimax_basic():
     ai = AI(depth=4)
     res = ai.choose(b)
     assert res.move in range(0,6)
+
+def test_time_budgeted_choose():
+    import time
+    b = Board.new(4)
+    ai = AI()
+    t0 = time.perf_counter()
+    res = ai.choose(b, time_ms=200)
+    elapsed = time.perf_counter() - t0
+    assert res.move in range(0,6)
+    assert res.depth >= 1
+    assert elapsed < 1.0
+
+def test_move_ordering_prefers_tt_then_extra_turn():
+    b = Board.new(4)
+    ai = AI()
+    # pit 2 holds 4 stones and lands in A's store
+    assert ai.order_moves(b, b.legal_moves(), 0)[0] == 2
+    assert ai.order_moves(b, b.legal_moves(), 0, tt_move=5)[:2] == [5, 2]
+
+def test_parallel_root_split_matches_sequential():
+    b = Board.new(4)
+    b.apply_move(2)
+    b.apply_move(0)
+    seq = AI(depth=4).choose(b)
+    ai = AI(depth=4, workers=2)
+    try:
+        par = ai.choose(b)
+    finally:
+        ai.close()
+    assert par.value == seq.value
+    assert par.move in b.legal_moves()
+    assert par.nodes > 0
+
+def test_root_split_keeps_the_deadline_for_queued_moves():
+    import time
+    import pytest
+    from mancala.ai import SearchTimeout
+    from mancala.parallel import RootSplitter
+    # Moving pit 4 captures B's last stones and ends the game, so the other
+    # root moves all queue behind it on the single worker.
+    b = Board([6, 6, 6, 6, 1, 0, 0, 4, 0, 0, 0, 0, 0, 0], 0)
+    splitter = RootSplitter(1, use_tt=False, tt_mb=0)
+    try:
+        splitter.search(b, [4, 0], 1)  # start the worker
+        t0 = time.perf_counter()
+        with pytest.raises(SearchTimeout):
+            splitter.search(b, [4, 0, 1, 2, 3], 30, t0 + 0.3)
+        elapsed = time.perf_counter() - t0
+    finally:
+        splitter.close()
+    assert elapsed < 0.7
+
+def test_root_split_workers_age_their_tables():
+    import math
+    import multiprocessing
+    from mancala import parallel
+    # Run the worker side in this process to look at its table.
+    parallel._init_worker(True, 1, multiprocessing.Value('d', -math.inf))
+    try:
+        b = Board.new(4)
+        for gen in (5, 6):
+            parallel._search_root_move(list(b.pits), b.current, 2, 2, None, gen)
+            assert parallel._AI.tt.generation == gen
+    finally:
+        parallel._AI = parallel._ALPHA = None
+
+def test_lazy_smp_search():
+    b = Board.new(4)
+    ai = AI(depth=4, workers=2, smp=True)
+    try:
+        res = ai.choose(b)
+        timed = ai.choose(b, time_ms=200)
+    finally:
+        ai.close()
+    assert res.move in range(0,6) and res.nodes > 0
+    assert timed.move in range(0,6) and timed.depth >= 1
+
+def test_ponder_prepares_answers_for_every_reply():
+    from mancala.ai import reply_positions
+    b = Board.new(4)
+    ai = AI(depth=3)
+    ai.ponder(b, max_depth=3)
+    replies = reply_positions(b)
+    assert replies and all(r.current == 1 for r in replies)
+    assert {r.key for r in replies} == set(ai.pondered)
+    r = replies[0]
+    hit = ai.pondered[r.key]
+    res = ai.choose(r)
+    assert res is hit and res.depth == 3
+    assert res.move == AI(depth=3).choose(r).move
+    # A timed search continues from the pondered depth.
+    ai.ponder(b, max_depth=3)
+    assert ai.choose(r, time_ms=50).depth > 3
+
+def test_search_stats_are_optional_and_consistent():
+    b = Board.new(4)
+    assert AI(depth=4).choose(b).stats is None
+    res = AI(depth=5, stats=True).choose(b)
+    st = res.stats
+    assert st.nodes == res.nodes and st.nodes_per_depth == {5: res.nodes}
+    assert st.tt_hits <= st.tt_probes and st.tt_cutoffs <= st.tt_hits
+    assert sum(st.cutoff_index) > 0 and 0 < st.first_move_cutoffs <= 1
+    assert st.evals > 0 and st.nps > 0
+    assert st.pv[0] == res.move
+    for m in st.pv:  # the PV replays as legal moves
+        assert m in b.legal_moves()
+        b.apply_move(m)
+    res = AI(time_ms=100, stats=True).choose(Board.new(4))
+    assert max(res.stats.nodes_per_depth) >= res.depth
+    assert res.stats.nodes == res.nodes
+
+def _plain_minimax(ai, b, d, root):
+    """Unpruned reference search with the same depth and extra-turn rules."""
+    if d == 0 or b.terminal() or not b.legal_moves():
+        return ai.evaluate(b, root)
+    vals = []
+    for m in b.legal_moves():
+        c = b.clone()
+        extra, _ = c.apply_move(m)
+        vals.append(_plain_minimax(ai, c, d if extra else d - 1, root))
+    return max(vals) if b.current == root else min(vals)
+
+def test_pvs_matches_unpruned_search_and_aspiration_matches_full_window():
+    from mancala.bench import corpus
+    positions = corpus(8, seed=5)
+    for b in positions:
+        for use_tt in (False, True):
+            res = AI(depth=3, use_tt=use_tt).choose(b.clone())
+            assert abs(res.value - _plain_minimax(AI(), b, 3, b.current)) < 1e-9
+    for b in positions[:3]:
+        ai = AI()
+        wide = AI(depth=6).choose(b.clone())
+        asp = ai.iterative_deepening(b.clone(), 1e9, max_depth=6)
+        assert asp.depth == 6 and abs(asp.value - wide.value) < 1e-9
+
+def test_search_on_smaller_variants():
+    import random
+    from mancala.rules import Variant
+    rnd = random.Random(3)
+    for spec in ("4x3", "4x3,empty-capture,sweep-emptied", "5x3,oware"):
+        b = Board.new(variant=Variant.parse(spec))
+        for _ in range(4):
+            b.apply_move(rnd.choice(b.legal_moves()))
+        if b.terminal():
+            continue
+        res = AI(depth=4).choose(b.clone())
+        assert res.move in b.legal_moves()
+        assert abs(res.value - _plain_minimax(AI(), b, 4, b.current)) < 1e-9
+
+def test_root_split_and_ordering_on_a_larger_variant():
+    from mancala.rules import Variant
+    b = Board.new(variant=Variant.parse("8x3"))
+    b.apply_move(0)
+    assert b.current == 1
+    ordered = AI().order_moves(b, b.legal_moves(), 0)
+    assert sorted(ordered) == b.legal_moves()
+    seq = AI(depth=2).choose(b.clone())
+    ai = AI(depth=2, workers=2)
+    try:
+        par = ai.choose(b)
+    finally:
+        ai.close()
+    assert par.value == seq.value and par.move in b.legal_moves()
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mancala.batch import BatchBoard
+from mancala.board import Board
+
+def test_batch_matches_board_on_random_games():
+    rnd = random.Random(3)
+    for stones in (1, 4, 6, 13):
+        boards = [Board.new(stones) for _ in range(32)]
+        batch = BatchBoard.new(len(boards), stones)
+        while not all(b.terminal() for b in boards):
+            mask = batch.legal_moves_mask()
+            actions = np.zeros(len(boards), dtype=int)
+            expect = []
+            for i, b in enumerate(boards):
+                if b.terminal():
+                    expect.append((False, False))
+                    continue
+                first = 0 if b.current == 0 else 7
+                assert sorted(int(a) + first for a in np.nonzero(mask[i])[0]) == sorted(b.legal_moves())
+                m = rnd.choice(b.legal_moves())
+                actions[i] = m - first
+                extra, end = b.apply_move(m)
+                expect.append((extra, end is not None))
+            extra, ended = batch.apply_moves(actions)
+            assert [(bool(e), bool(d)) for e, d in zip(extra, ended)] == expect
+            assert [(b.pits, b.current) for b in batch.to_boards()] == [(b.pits, b.current) for b in boards]
+            assert list(batch.terminal_mask()) == [b.terminal() for b in boards]
+
+def test_batch_rejects_empty_pit_and_rollout_finishes():
+    b = Board.new(4)
+    b.apply_move(2)  # extra turn, pit 2 now empty
+    batch = BatchBoard.from_boards([b])
+    with pytest.raises(ValueError):
+        batch.apply_moves([2])
+    batch = BatchBoard.new(64)
+    diff = batch.rollout(np.random.default_rng(0))
+    assert batch.terminal_mask().all()
+    assert (batch.scores().sum(axis=1) == 48).all()
+    assert diff.shape == (64,)
@@ -0,0 +1,17 @@
+from mancala.bench import compare, corpus, run
+
+def test_bench_runs_and_flags_regressions():
+    positions = corpus(6)
+    assert len(positions) == 6 and not any(b.terminal() for b in positions)
+    r = run(rounds=1, positions=positions, choose_positions=2, depths=(2,))
+    assert set(r) == {"apply_move", "clone", "legal_moves", "zobrist_hash", "evaluate", "evaluate_packed",
+                      "choose_d2"}
+    assert all(v["ns_per_op"] > 0 for v in r.values())
+    assert r["choose_d2"]["nps"] > 0 and r["choose_d2"]["peak_kb"] > 0
+    assert compare(r, r) == []
+    faster = {k: {"ns_per_op": v["ns_per_op"] / 2} for k, v in r.items()}
+    assert len(compare(r, faster, threshold=0.25)) == len(r)
+    assert compare(r, faster, threshold=1.5) == []
+    leaner = {k: dict(v, peak_kb=v["peak_kb"] / 2) for k, v in r.items() if "peak_kb" in v}
+    slow = compare(r, leaner)
+    assert len(slow) == 1 and slow[0].startswith("choose_d2:") and "KiB peak" in slow[0]
@@ -25,3 +25,199 @@ def test_end_condition_collect():
     b.current = PLAYER_A
     b.apply_move(5)
     assert b.terminal()
+
+def test_incremental_key_matches_full_hash():
+    import random
+    from mancala.tt import zobrist_for
+    rnd = random.Random(7)
+    for stones in (4, 6):
+        b = Board.new(stones)
+        while not b.terminal():
+            b.apply_move(rnd.choice(b.legal_moves()))
+            assert b.key == zobrist_for(12 * stones).hash(b)
+            assert b.clone().key == b.key
+
+def test_packed_board_matches_board():
+    import random
+    from mancala.packed import PackedBoard
+    rnd = random.Random(3)
+    b = Board.new(6)
+    p = PackedBoard.from_board(b)
+    while not b.terminal():
+        assert p.legal_moves() == b.legal_moves()
+        m = rnd.choice(b.legal_moves())
+        assert p.apply_move(m) == b.apply_move(m)
+        assert list(p.pits) == b.pits and p.current == b.current and p.key == b.key
+        assert PackedBoard.unpack(p.pack()) == p
+        assert p.to_board() == b
+    assert p.terminal()
+
+def _reference_sow(pits, player, pit_index):
+    from mancala.rules import TOTAL_PITS, opp_store
+    pits = pits.copy()
+    stones, pits[pit_index] = pits[pit_index], 0
+    idx = pit_index
+    while stones > 0:
+        idx = (idx + 1) % TOTAL_PITS
+        if idx == opp_store(player):
+            continue
+        pits[idx] += 1
+        stones -= 1
+    return pits, idx
+
+def test_closed_form_sowing_matches_stone_loop():
+    import random
+    from mancala.rules import PLAYER_B, pit_range, own_store
+    rnd = random.Random(11)
+    for _ in range(500):
+        player = rnd.choice((PLAYER_A, PLAYER_B))
+        pits = [rnd.randint(0, 40) for _ in range(14)]
+        m = rnd.choice(list(pit_range(player)))
+        pits[m] = rnd.randint(1, 60)
+        expected, last = _reference_sow(pits, player, m)
+        b = Board(pits, player)
+        extra, end = b.apply_move(m)
+        assert extra == (last == own_store(player))
+        if not extra and end is None and expected[last] != 1:
+            assert b.pits == expected
+
+def test_make_unmake_restores_position():
+    import random
+    rnd = random.Random(5)
+    for stones in (3, 4, 8):
+        b = Board.new(stones)
+        while not b.terminal():
+            before = (b.pits.copy(), b.current, b.key)
+            for m in b.legal_moves():
+                _, _, u = b.apply_move(m, undo=True)
+                b.unmake(u)
+                assert (b.pits, b.current, b.key) == before
+            b.apply_move(rnd.choice(b.legal_moves()))
+
+def test_rule_tables_match_helpers():
+    from mancala.rules import RULES, PLAYER_B, pit_range, own_store, opposite
+    for player in (PLAYER_A, PLAYER_B):
+        assert RULES.sides[player] == tuple(pit_range(player))
+        assert RULES.stores[player] == own_store(player)
+        for pit in pit_range(player):
+            assert RULES.opposite[pit] == opposite(pit)
+            for stones in range(1, 30):
+                pits = [0] * 14
+                pits[pit] = stones
+                extra, _ = Board(pits, player).apply_move(pit)
+                assert extra == (RULES.landing[player][pit][stones % RULES.cycle_len] == own_store(player))
+
+def test_variant_spec_round_trips():
+    from mancala.rules import Variant, KALAH, RULES
+    assert str(KALAH) == "6x4" and KALAH.rules is RULES
+    for spec in ("4x3", "5x2,empty-capture,sweep-emptied", "6x4,oware"):
+        assert str(Variant.parse(spec)) == spec
+    assert Variant.parse("6x3").rules is RULES
+
+def test_variant_rules():
+    from mancala.rules import Variant
+    # Empty capture: the last stone alone goes to the store.
+    v = Variant(4, 3, empty_capture=True)
+    b = Board([1, 0, 2, 0, 0, 3, 3, 0, 3, 0], 0, v)
+    b.apply_move(0)
+    assert b.pits == [0, 0, 2, 0, 1, 3, 3, 0, 3, 0] and b.current == 1
+    # Oware: take the last pit and the 2s/3s sown before it.
+    v = Variant(4, 3, capture="oware")
+    b = Board([1, 0, 0, 3, 0, 1, 2, 5, 0, 0], 0, v)
+    b.apply_move(3)
+    assert b.pits == [1, 0, 0, 0, 6, 0, 0, 5, 0, 0]
+    # ... but not every stone the opponent has.
+    b = Board([1, 0, 0, 3, 0, 1, 2, 0, 0, 0], 0, v)
+    b.apply_move(3)
+    assert b.pits == [1, 0, 0, 0, 1, 2, 3, 0, 0, 0]
+    # Sweep to the player who ran out.
+    v = Variant(4, 3, sweep="emptied")
+    b = Board([0, 0, 0, 1, 0, 2, 2, 2, 2, 0], 0, v)
+    _, end = b.apply_move(3)
+    assert end == "side_empty" and b.pits == [0, 0, 0, 0, 9, 0, 0, 0, 0, 0]
+
+def test_variants_make_unmake_and_keys():
+    import random
+    from mancala.rules import Variant
+    from mancala.packed import PackedBoard
+    rnd = random.Random(9)
+    for spec in ("3x2", "4x3,empty-capture", "5x4,oware", "4x3,sweep-emptied", "8x6"):
+        v = Variant.parse(spec)
+        for _ in range(5):
+            b = Board.new(variant=v)
+            while not b.terminal():
+                before = (b.pits.copy(), b.current, b.key)
+                for m in b.legal_moves():
+                    p = PackedBoard.from_board(b)
+                    _, _, u = b.apply_move(m, undo=True)
+                    assert sum(b.pits) == v.stones and b.key == b.zob.hash(b)
+                    p.apply_move(m)
+                    assert list(p.pits) == b.pits and p.current == b.current and p.key == b.key
+                    b.unmake(u)
+                    assert (b.pits, b.current, b.key) == before
+                b.apply_move(rnd.choice(b.legal_moves()))
+
+def test_occupancy_tracks_pits():
+    import random
+    from mancala.rules import Variant, PLAYER_B
+    from mancala.packed import PackedBoard
+    rnd = random.Random(4)
+    for spec in ("6x4", "6x9", "4x3,empty-capture", "5x4,oware", "4x3,sweep-emptied"):
+        v = Variant.parse(spec)
+        b = Board.new(variant=v)
+        p = PackedBoard.from_board(b)
+        while not b.terminal():
+            assert b.occ == p.occ == v.rules.occupancy(b.pits)
+            assert b.legal_moves() == [i for i in v.rules.sides[b.current] if b.pits[i]]
+            for player in (PLAYER_A, PLAYER_B):
+                assert b.side_total(player) == sum(b.pits[i] for i in v.rules.sides[player])
+                assert b.side_empty(player) == (b.side_total(player) == 0)
+            m = rnd.choice(b.legal_moves())
+            b.apply_move(m)
+            p.apply_move(m)
+        assert p.terminal() and not any(b.pits[i] for s in v.rules.sides for i in s)
+
+def test_in_place_pit_edits_are_seen():
+    b = Board.new(4)
+    b.apply_move(2)
+    a_store = b.variant.rules.stores[0]
+    for i in range(len(b.pits)):
+        if i != a_store:
+            b.pits[i] = 0
+    assert b.terminal() and b.legal_moves() == []
+    assert b.side_empty(0) and b.side_total(1) == 0
+    b.pits[0] = 3
+    assert not b.terminal() and b.legal_moves() == [0] and b.side_total(0) == 3
+    b.apply_move(0)
+    assert b.pits[a_store] > 0
+
+def test_in_place_pit_edits_update_the_key():
+    from mancala.ai import AI
+    b = Board.new(4)
+    b.apply_move(2)
+    b.pits[7] = 60
+    assert b.key == b.zob.hash(b) == Board(list(b.pits), b.current).key
+    assert b.zob.max_stones >= sum(b.pits)
+    b.apply_move(0)
+    assert b.key == b.zob.hash(b)
+    assert AI(depth=2).choose(b).move in b.legal_moves()
+
+def test_packed_board_holds_more_than_255_stones():
+    import random
+    from mancala.ai import AI
+    from mancala.packed import PackedBoard
+    b = Board([0, 0, 0, 0, 0, 1, 255, 1, 1, 1, 1, 1, 1, 20], 0)
+    assert AI(depth=3).choose(b.clone()).move == 5
+    rnd = random.Random(4)
+    b = Board.new(30)
+    p = PackedBoard.from_board(b)
+    assert not isinstance(p.pits, bytearray)
+    while not b.terminal():
+        m = rnd.choice(b.legal_moves())
+        q = p.clone()
+        _, _, u = q.apply_move(m, undo=True)
+        q.unmake(u)
+        assert q == p and q.key == p.key and q.occ == p.occ
+        assert p.apply_move(m) == b.apply_move(m)
+        assert list(p.pits) == b.pits and p.key == b.key and p.occ == b.occ
+    assert p.terminal()
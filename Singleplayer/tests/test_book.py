@@ -0,0 +1,23 @@
+from mancala.ai import AI
+from mancala.board import Board
+from mancala.book import OpeningBook, opening_positions
+
+def test_opening_positions_count_extra_turn_chains_as_one_ply():
+    # Pit 2 ends in A's store, so the position after it is still ply 0.
+    positions = opening_positions(4, 1)
+    after = Board.new(4)
+    after.apply_move(2)
+    assert {b.key for b in positions} == {Board.new(4).key, after.key}
+
+def test_book_roundtrip_and_ai_uses_it(tmp_path):
+    book = OpeningBook.build(4, plies=1, depth=3)
+    path = str(tmp_path / "book.db")
+    book.save(path)
+    loaded = OpeningBook.load(path)
+    b = Board.new(4)
+    assert loaded.probe(b) == book.probe(b) is not None
+    res = AI(depth=3, book=loaded).choose(b)
+    assert (res.move, res.nodes) == (book.probe(b)[0], 0)
+    b.apply_move(0)
+    assert loaded.probe(b) is None
+    loaded.close()
@@ -0,0 +1,73 @@
+import pickle
+import random
+import sys
+
+import pytest
+
+from mancala.board import Board
+from mancala.dbfile import PLAY_PITS, TableFile, index, positions
+from mancala.endgame import EndgameDB, compositions
+from mancala.rules import PLAYER_A, PLAYER_B, opp_store
+
+def _exact(b, player):
+    """Plain exhaustive search of the final store difference for player."""
+    if b.terminal():
+        return b.score(player) - b.pits[opp_store(player)]
+    vals = []
+    for m in b.legal_moves():
+        c = b.clone()
+        c.apply_move(m)
+        vals.append(_exact(c, player))
+    return max(vals) if b.current == player else min(vals)
+
+def _random_position(rnd, stones):
+    pits = [0] * 14
+    for _ in range(stones):
+        pits[rnd.choice(PLAY_PITS)] += 1
+    pits[6], pits[13] = rnd.randint(0, 20), rnd.randint(0, 20)
+    return Board(pits, rnd.choice((PLAYER_A, PLAYER_B)))
+
+def test_index_is_dense_ranking():
+    seen = set()
+    for n in range(4):
+        for comp in compositions(n, 12):
+            pits = [0] * 14
+            for i, x in zip(PLAY_PITS, comp):
+                pits[i] = x
+            seen.add(index(pits, PLAYER_A))
+            seen.add(index(pits, PLAYER_B))
+    assert seen == set(range(positions(3)))
+
+def test_endgame_values_are_exact(tmp_path):
+    limit = sys.getrecursionlimit()
+    db = EndgameDB.build(5)
+    assert sys.getrecursionlimit() == limit
+    path = tmp_path / "eg.db"
+    db.save(str(path))
+    db = EndgameDB.load(str(path))
+    rnd = random.Random(2)
+    for _ in range(40):
+        b = _random_position(rnd, rnd.randint(1, 5))
+        if b.terminal() or not b.legal_moves() or b.side_empty(PLAYER_A) or b.side_empty(PLAYER_B):
+            continue
+        assert db.final_diff(b, PLAYER_A) == _exact(b, PLAYER_A)
+    assert db.probe(Board.new(4)) is None
+
+def test_table_file_checks_header_and_data(tmp_path):
+    path = tmp_path / "eg.db"
+    EndgameDB.build(3).save(str(path))
+    db = EndgameDB.load(str(path))
+    b = Board([0,1,0,0,0,0,5, 0,0,2,0,0,0,7], PLAYER_A)
+    assert db.file.lookup(b) == db.probe(b) is not None
+    assert pickle.loads(pickle.dumps(db)).probe(b) == db.probe(b)
+    db.close()
+
+    raw = bytearray(path.read_bytes())
+    raw[-1] ^= 0x7F
+    path.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="data checksum"):
+        TableFile(str(path))
+    raw[8] += 1  # version field
+    path.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="version"):
+        TableFile(str(path))
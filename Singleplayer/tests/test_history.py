@@ -8,3 +8,15 @@ def test_undo_redo_roundtrip():
     b.apply_move(0)
     assert h.undo(b) is True
     assert h.redo(b) is True
+
+def test_undo_redo_with_move_records():
+    b = Board.new(4)
+    h = History()
+    start = b.as_tuple()
+    h.apply_move(b, 2)
+    h.apply_move(b, 5)
+    after = b.as_tuple()
+    assert h.undo(b) and h.undo(b)
+    assert b.as_tuple() == start and not h.undo(b)
+    assert h.redo(b) and h.redo(b)
+    assert b.as_tuple() == after and not h.redo(b)
@@ -0,0 +1,34 @@
+import time
+from mancala.board import Board
+from mancala.mcts import MCTS
+from mancala.selfplay import run
+
+def test_mcts_finds_winning_capture():
+    b = Board.new(1)
+    # A to move: pit 1 lands in empty pit 2 and captures the 5 stones opposite.
+    b.pits = [1,1,0,0,0,0,18, 0,0,0,5,0,1,22]
+    res = MCTS(iterations=300, seed=0).choose(b)
+    assert res.move == 1
+    assert res.value > 0.9
+
+def test_mcts_time_budget_and_tree_reuse():
+    ai = MCTS(time_ms=100, seed=1)
+    b = Board.new(4)
+    t0 = time.perf_counter()
+    res = ai.choose(b)
+    assert time.perf_counter() - t0 < 1.0
+    assert res.move in b.legal_moves() and res.nodes > 0
+    b.apply_move(res.move)
+    while b.current == 0:
+        b.apply_move(b.legal_moves()[0])
+    before = ai.root
+    res2 = ai.choose(b, time_ms=20)
+    # The new root comes from the previous tree, so it already had visits.
+    assert ai.root is not before and ai.root.parent is None
+    assert ai.root.visits > res2.nodes
+
+def test_mcts_batched_rollouts_beat_random():
+    ai = MCTS(iterations=50, batch=32, seed=2)
+    assert ai.choose(Board.new(4)).nodes == 50 * 32
+    s = run(2, "mcts:300", "random")
+    assert s["wins"][0] == 2
@@ -0,0 +1,20 @@
+import io
+import json
+from mancala.board import Board
+from mancala.selfplay import play_game, run
+
+def test_play_game_replays_to_reported_score():
+    r = play_game(0, "ai:2", "random", seed=1)
+    b = Board.new(4)
+    for m in r["moves"]:
+        b.apply_move(m)
+    assert b.terminal()
+    assert r["score"] == [b.pits[6], b.pits[13]]
+    assert r["nodes"][0] > 0 and r["nodes"][1] == 0
+
+def test_run_streams_jsonl_and_swaps_sides():
+    out = io.StringIO()
+    s = run(4, "greedy", "random", out=out)
+    lines = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert [r["a"] for r in lines] == ["greedy", "random", "greedy", "random"]
+    assert s["games"] == 4 and sum(s["wins"]) + s["draws"] == 4
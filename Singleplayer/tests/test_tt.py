@@ -0,0 +1,75 @@
+from mancala.tt import TranspositionTable, EXACT, LOWER
+
+def test_tt_store_probe_and_bounded_size():
+    tt = TranspositionTable(size_mb=0.01)
+    n = len(tt)
+    tt.store(12345, 3, EXACT, 1.5, 2)
+    assert tt.probe(12345) == (3, EXACT, 1.5, 2)
+    assert tt.probe(999) is None
+    for k in range(10000):
+        tt.store(k * 7919, k % 5, LOWER, 0.0, None)
+    assert len(tt) == n
+
+def test_tt_depth_preferred_slot_survives():
+    tt = TranspositionTable(size_mb=0.01)
+    k1, k2, k3 = 1, 1 + (tt.mask + 1), 1 + 2 * (tt.mask + 1)  # same bucket
+    tt.store(k1, 8, EXACT, 1.0, 0)
+    tt.store(k2, 2, EXACT, 2.0, 1)
+    tt.store(k3, 1, EXACT, 3.0, 2)
+    assert tt.probe(k1) == (8, EXACT, 1.0, 0)
+    assert tt.probe(k2) is None
+    assert tt.probe(k3) == (1, EXACT, 3.0, 2)
+
+def test_shared_tt_roundtrip_and_torn_slot_is_a_miss():
+    from mancala.tt import SharedTranspositionTable, UPPER
+    tt = SharedTranspositionTable(size_mb=0.01)
+    other = SharedTranspositionTable(name=tt.name)
+    try:
+        tt.store(424242, 5, UPPER, -3.25, 9)
+        assert other.probe(424242) == (5, UPPER, -3.25, 9)
+        i = (424242 & tt.mask) * 6
+        tt.words[i + 1] ^= 1  # value word changed without its check word
+        assert other.probe(424242) is None
+    finally:
+        other.close()
+        tt.close()
+
+def test_tt_stale_entries_give_way_after_new_search():
+    tt = TranspositionTable(size_mb=0.01)
+    k1, k2, k3 = 1, 1 + (tt.mask + 1), 1 + 2 * (tt.mask + 1)  # same bucket
+    tt.store(k1, 8, EXACT, 1.0, 0)
+    tt.new_search()
+    tt.store(k2, 2, EXACT, 2.0, 1)   # shallower, but k1 is from an older search
+    tt.store(k3, 1, EXACT, 3.0, 2)
+    assert tt.probe(k1) is None
+    assert tt.probe(k2) == (2, EXACT, 2.0, 1)
+    tt.new_search()
+    assert tt.probe(k2) is not None  # a hit refreshes the entry's generation
+    tt.store(k1, 1, EXACT, 1.0, 0)
+    assert tt.probe(k2) == (2, EXACT, 2.0, 1)
+
+def test_ai_keeps_tt_between_moves_until_new_game():
+    from mancala.ai import AI
+    from mancala.board import Board
+    ai = AI(depth=5)
+    b = Board.new(4)
+    cold = ai.choose(b)
+    warm = ai.choose(b)
+    assert warm.move == cold.move and warm.nodes < cold.nodes
+    ai.new_game()
+    assert ai.choose(b).nodes == cold.nodes
+
+def test_zobrist_tables_are_shared_sized_and_leave_global_random_alone():
+    import random
+    from mancala.board import Board
+    from mancala.tt import ZOBRIST, Zobrist, zobrist_for
+    state = random.getstate()
+    big = Zobrist(120)
+    assert random.getstate() == state
+    assert zobrist_for(120) is zobrist_for(120) and zobrist_for(12) is ZOBRIST
+    b = Board.new(4)
+    assert big.hash(b) == ZOBRIST.hash(b)  # every table agrees on the keys it shares
+    # 10 stones per pit: 120 in play, and pits above 48 no longer collide.
+    b1 = Board([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 49, 71], 0)
+    b2 = Board([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 50, 70], 0)
+    assert b1.key != b2.key and b1.zob is zobrist_for(120)